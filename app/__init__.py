@@ -1,6 +1,11 @@
 from .yang_manager import YANGManager
 from .rpc_handler import RPCHandler
+from .job_manager import JobManager
+from .admission import AdmissionController
+from .replication import ReplicaFollower
+from .checkpoint import DatastoreCheckpoint
 from .server import RESTCONFServer
+from .async_server import AsyncRESTCONFServer
 
 __version__ = "1.0.0"
 __author__ = "RESTCONF Developer"
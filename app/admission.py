@@ -0,0 +1,117 @@
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import parse_qs
+from .utils.exceptions import ServiceUnavailableError
+
+
+class AdmissionController:
+    """Контроль допуска запросов: ограничивает очередь и параллелизм по классам"""
+
+    READ = "read"
+    FULL_READ = "full_read"
+    WRITE = "write"
+
+    def __init__(self, budgets=None, per_client=8, max_queue=64, queue_timeout=0.5,
+                 retry_after=1, list_distance=None):
+        self.budgets = {self.READ: 8, self.FULL_READ: 2, self.WRITE: 2}
+        self.budgets.update(budgets or {})
+        self.per_client = per_client
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        # list_distance(path) - уровни от ресурса до ближайшего списка (YANGManager.list_distance)
+        self.list_distance = list_distance
+
+        self._cond = threading.Condition()
+        self._active = {name: 0 for name in self.budgets}
+        self._clients = {}
+        self._waiting = 0
+        self._max_waiting = 0
+        self._admitted = {name: 0 for name in self.budgets}
+        self._rejected = {"queue-full": 0, "client-limit": 0, "queue-timeout": 0}
+
+    def classify(self, method, path, query=""):
+        """Определяет класс запроса по методу, пути и параметру depth
+
+        Чтение ресурса, вывод которого (с учетом depth) включает записи
+        списков, считается чтением крупного поддерева.
+        """
+        if path in ("/restconf/batch", "/admin/snapshot"):
+            return self.FULL_READ
+        if method in ("PATCH", "POST", "PUT", "DELETE"):
+            return self.WRITE
+        if path == "/restconf/data":
+            return self.FULL_READ
+        if path.startswith("/restconf/data/") and self.list_distance:
+            distance = self.list_distance(path[len("/restconf/data/"):])
+            depth = parse_qs(query).get("depth", [""])[0]
+            if distance is not None and not (depth.isdigit() and int(depth) <= distance):
+                return self.FULL_READ
+        return self.READ
+
+    @contextmanager
+    def admit(self, client, request_class):
+        """Допускает запрос к обработке или отклоняет его с 503"""
+        self._acquire(client, request_class)
+        try:
+            yield
+        finally:
+            self._release(client, request_class)
+
+    def get_metrics(self):
+        """Возвращает метрики очереди и отказов"""
+        with self._cond:
+            return {
+                "admission": {
+                    "queue-depth": self._waiting,
+                    "max-queue-depth": self._max_waiting,
+                    "queue-limit": self.max_queue,
+                    "active": dict(self._active),
+                    "budgets": dict(self.budgets),
+                    "admitted": dict(self._admitted),
+                    "rejected": dict(self._rejected),
+                    "rejected-total": sum(self._rejected.values()),
+                    "clients": len(self._clients)
+                }
+            }
+
+    def _acquire(self, client, request_class):
+        """Ожидает свободного места в бюджете класса"""
+        with self._cond:
+            if self._clients.get(client, 0) >= self.per_client:
+                self._reject("client-limit", f"Превышен лимит параллельных запросов клиента {client}")
+
+            if self._active[request_class] >= self.budgets[request_class]:
+                if self._waiting >= self.max_queue:
+                    self._reject("queue-full", "Очередь запросов переполнена")
+
+                self._waiting += 1
+                self._max_waiting = max(self._max_waiting, self._waiting)
+                deadline = time.monotonic() + self.queue_timeout
+                try:
+                    while self._active[request_class] >= self.budgets[request_class]:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._reject("queue-timeout", "Истекло время ожидания в очереди")
+                        self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+            self._active[request_class] += 1
+            self._admitted[request_class] += 1
+            self._clients[client] = self._clients.get(client, 0) + 1
+
+    def _release(self, client, request_class):
+        """Освобождает место в бюджете класса"""
+        with self._cond:
+            self._active[request_class] -= 1
+            self._clients[client] -= 1
+            if not self._clients[client]:
+                del self._clients[client]
+            self._cond.notify_all()
+
+    def _reject(self, reason, message):
+        """Учитывает отказ и выбрасывает 503 (вызывается под блокировкой)"""
+        self._rejected[reason] += 1
+        raise ServiceUnavailableError(error_message=message, retry_after=self.retry_after)
@@ -0,0 +1,242 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from .restconf import RESTCONFHandler, create_restconf_handler
+from .server import RESTCONFServer
+
+# Максимальный размер строки запроса вместе с заголовками
+MAX_REQUEST_HEAD = 65536
+
+
+class _StreamReaderFile:
+    """Файловый объект для обработчика: заголовки из буфера, тело - из asyncio потока"""
+
+    def __init__(self, head, reader, loop, timeout):
+        self._head = head
+        self._pos = 0
+        self._reader = reader
+        self._loop = loop
+        self._timeout = timeout
+
+    def readline(self, limit=-1):
+        """Читает строку заголовков из буфера, строки тела (chunked) - из потока"""
+        if self._pos >= len(self._head):
+            return self._run(self._read_line())
+        end = self._head.find(b"\n", self._pos)
+        end = len(self._head) if end < 0 else end + 1
+        if limit is not None and limit >= 0:
+            end = min(end, self._pos + limit)
+        line = self._head[self._pos:end]
+        self._pos = end
+        return line
+
+    def read(self, size=-1):
+        """Читает тело запроса (блокирует поток пула, а не цикл событий)"""
+        if size is None or size < 0:
+            raise ValueError("Чтение тела до конца потока не поддерживается")
+        if size == 0:
+            return b""
+        return self._run(self._read_exactly(size))
+
+    def _run(self, coro):
+        return asyncio.run_coroutine_threadsafe(
+            asyncio.wait_for(coro, self._timeout), self._loop
+        ).result()
+
+    async def _read_exactly(self, size):
+        try:
+            return await self._reader.readexactly(size)
+        except asyncio.IncompleteReadError as e:
+            return e.partial
+
+    async def _read_line(self):
+        try:
+            return await self._reader.readuntil(b"\n")
+        except asyncio.IncompleteReadError as e:
+            return e.partial
+        except asyncio.LimitOverrunError:
+            return b""
+
+    def close(self):
+        pass
+
+
+class _TransportWriter:
+    """Файловый объект для обработчика: запись в транспорт через цикл событий"""
+
+    def __init__(self, writer, loop):
+        self._writer = writer
+        self._loop = loop
+        self.closed = False
+
+    def write(self, data):
+        if self._writer.is_closing():
+            raise BrokenPipeError("Соединение закрыто клиентом")
+        self._loop.call_soon_threadsafe(self._writer.write, bytes(data))
+        return len(data)
+
+    def flush(self):
+        """Ждет отправки буфера, чтобы медленный клиент не копил данные в памяти"""
+        if self._writer.is_closing():
+            raise BrokenPipeError("Соединение закрыто клиентом")
+        try:
+            asyncio.run_coroutine_threadsafe(self._writer.drain(), self._loop).result()
+        except ConnectionError:
+            raise BrokenPipeError("Соединение закрыто клиентом")
+
+    def close(self):
+        self.closed = True
+
+
+class _AsyncRESTCONFHandler(RESTCONFHandler):
+    """Обработчик одного запроса поверх asyncio потока (маршрутизация та же)"""
+
+    # Ответы несут Content-Length, поэтому соединение можно держать открытым
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        self.rfile, self.wfile = self.request
+
+    def _wait(self, wait):
+        # Ожидание выполняет цикл событий соединения, поток пула освобождается
+        self.pending = wait
+
+    def handle(self):
+        self.close_connection = True
+        self.handle_one_request()
+
+    def finish(self):
+        pass
+
+
+class AsyncRESTCONFServer(RESTCONFServer):
+    """HTTP сервер на asyncio: соединения ждут в цикле событий, запросы - в пуле потоков"""
+
+    def __init__(self, host, port, yang_manager, rpc_handler, job_manager, admission,
+                 replica=None, body_limits=None, workers=32, keepalive_timeout=60):
+        super().__init__(host, port, yang_manager, rpc_handler, job_manager, admission, replica,
+                         body_limits)
+        self.workers = workers
+        self.keepalive_timeout = keepalive_timeout
+        self.loop = None
+        self.server = None
+        self.executor = None
+        self.handler_class = None
+        self.connections = 0
+        self._stopped = threading.Event()
+
+    def start(self):
+        """Запускает цикл событий HTTP сервера"""
+        try:
+            asyncio.run(self._serve())
+        except KeyboardInterrupt:
+            print("\nОстанавливаем сервер...")
+            self.stop()
+        except Exception as e:
+            print(f"Ошибка запуска сервера: {e}")
+            raise
+
+    def stop(self):
+        """Останавливает HTTP сервер"""
+        if self.loop and not self._stopped.is_set():
+            self._stopped.set()
+            if not self.loop.is_closed():
+                self.loop.call_soon_threadsafe(self.server.close)
+            print("Сервер остановлен")
+        self.job_manager.shutdown()
+        if self.replica:
+            self.replica.stop()
+
+    async def _serve(self):
+        self.loop = asyncio.get_running_loop()
+        self.handler_class = create_restconf_handler(
+            self.yang_manager, self.rpc_handler, self.job_manager, self.admission,
+            self.body_limits, _AsyncRESTCONFHandler
+        )
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="restconf")
+        self.server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port,
+            limit=MAX_REQUEST_HEAD, backlog=1024
+        )
+
+        print(f"RESTCONF сервер (asyncio, {self.workers} потоков) запущен на {self.host}:{self.port}")
+        print(f"Доступ к API: http://{self.host}:{self.port}/restconf")
+        print("Для остановки нажмите Ctrl+C")
+
+        try:
+            async with self.server:
+                await self.server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _handle_connection(self, reader, writer):
+        """Обслуживает соединение: ожидание запросов не занимает поток"""
+        self.connections += 1
+        client_address = writer.get_extra_info("peername")
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.keepalive_timeout)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    return
+                except asyncio.LimitOverrunError:
+                    writer.write(b"HTTP/1.1 431 Request Header Fields Too Large\r\n"
+                                 b"Content-Length: 0\r\nConnection: close\r\n\r\n")
+                    await writer.drain()
+                    return
+
+                rfile = _StreamReaderFile(head, reader, self.loop, _AsyncRESTCONFHandler.timeout)
+                wfile = _TransportWriter(writer, self.loop)
+                handler = await self.loop.run_in_executor(self.executor, self._handle_request,
+                                                          rfile, wfile, client_address)
+                # Поток изменений и ожидание заданий ждут событий в цикле,
+                # а в пуле выполняются только короткие продолжения
+                while handler is not None and handler.pending is not None:
+                    wait, handler.pending = handler.pending, None
+                    await self._wait_event(wait)
+                    if not await self.loop.run_in_executor(self.executor, self._resume, handler, wait):
+                        handler = None
+                await writer.drain()
+                if handler is None or handler.close_connection:
+                    return
+                # Непрочитанное тело (например, при отказе 503 или 413) сбило бы
+                # разбор следующего запроса
+                headers = getattr(handler, "headers", None) or {}
+                has_body = headers.get("Content-Length", "0") != "0" or "Transfer-Encoding" in headers
+                if has_body and not (handler.request_body and handler.request_body.complete):
+                    return
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def _wait_event(self, wait):
+        """Ждет события ожидания обработчика не дольше его таймаута"""
+        event = asyncio.Event()
+        unsubscribe = wait.subscribe(lambda: self.loop.call_soon_threadsafe(event.set))
+        try:
+            if not wait.ready():
+                await asyncio.wait_for(event.wait(), wait.timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            unsubscribe()
+
+    def _resume(self, handler, wait):
+        """Продолжает обработку запроса после ожидания (в потоке пула)"""
+        try:
+            handler.pending = wait.resume()
+            handler.wfile.flush()
+            return True
+        except (BrokenPipeError, ConnectionError):
+            return False
+
+    def _handle_request(self, rfile, wfile, client_address):
+        """Выполняет запрос общим RESTCONF обработчиком в потоке пула"""
+        try:
+            return self.handler_class((rfile, wfile), client_address, self)
+        except (BrokenPipeError, ConnectionError):
+            return None
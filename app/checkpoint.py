@@ -0,0 +1,258 @@
+import gc
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import zlib
+from array import array
+from base64 import b64decode, b64encode
+from datetime import datetime
+from decimal import Decimal
+from yangson.instance import InstanceIdParser, RootNode
+from yangson.instroute import InstanceRoute
+from yangson.instvalue import ArrayValue, ObjectValue
+from .compact import CompactArrayValue, CompactObjectValue
+
+# Формат контрольной точки:
+#   заголовок (HEADER), таблица констант (JSON массив уникальных строк и
+#   чисел, UTF-8), выравнивание до 4 байт, дерево - массив 32-битных слов
+#   в прямом порядке обхода. Старшие 4 бита слова - тег, младшие 28 -
+#   аргумент (индекс константы или число членов).
+MAGIC = b"RCDSCKPT"
+VERSION = 1
+HEADER = struct.Struct("<8sI32sQQQQI")
+
+# Тег 0 - константа: слово листа равно индексу и декодируется без разбора тега
+_CONST, _OBJECT, _ARRAY, _DECIMAL, _TUPLE, _NONE, _TRUE, _FALSE, _BYTES, _ROUTE = range(10)
+_ARG_BITS = 28
+_ARG_MASK = (1 << _ARG_BITS) - 1
+
+
+def schema_hash(library_file, modules_dirs):
+    """Хэш библиотеки YANG и файлов модулей, с которыми построена модель"""
+    digest = hashlib.sha256()
+    with open(library_file, "rb") as f:
+        digest.update(f.read())
+    for modules_dir in modules_dirs:
+        for name in sorted(os.listdir(modules_dir)):
+            if name.endswith(".yang"):
+                digest.update(name.encode("utf-8"))
+                with open(os.path.join(modules_dir, name), "rb") as f:
+                    digest.update(f.read())
+    return digest.digest()
+
+
+def source_stat(data_file):
+    """Размер и время изменения JSON файла, которому соответствует контрольная точка"""
+    try:
+        stat = os.stat(data_file)
+        return stat.st_size, stat.st_mtime_ns
+    except FileNotFoundError:
+        return 0, 0
+
+
+def write_checkpoint(path, instance, schema_digest, source):
+    """Записывает данные экземпляра в двоичную контрольную точку (атомарно)"""
+    consts, index, words = [], {}, array("I")
+
+    def const(value):
+        key = (type(value), value)
+        position = index.get(key)
+        if position is None:
+            position = index[key] = len(consts)
+            consts.append(value)
+        return position
+
+    def encode(value):
+        if isinstance(value, ObjectValue):
+            words.append(_OBJECT << _ARG_BITS | len(value))
+            for name, member in value.items():
+                words.append(const(name))
+                encode(member)
+        elif isinstance(value, ArrayValue):
+            words.append(_ARRAY << _ARG_BITS | len(value))
+            for entry in value:
+                encode(entry)
+        elif value is None:
+            words.append(_NONE << _ARG_BITS)
+        elif value is True:
+            words.append(_TRUE << _ARG_BITS)
+        elif value is False:
+            words.append(_FALSE << _ARG_BITS)
+        elif isinstance(value, (str, int)):
+            words.append(_CONST << _ARG_BITS | const(value))
+        elif isinstance(value, Decimal):
+            words.append(_DECIMAL << _ARG_BITS | const(str(value)))
+        elif isinstance(value, InstanceRoute):
+            words.append(_ROUTE << _ARG_BITS | const(str(value)))
+        elif isinstance(value, tuple):
+            # identityref (имя, модуль), bits, empty
+            words.append(_TUPLE << _ARG_BITS | len(value))
+            for item in value:
+                encode(item)
+        elif isinstance(value, bytes):
+            words.append(_BYTES << _ARG_BITS | const(b64encode(value).decode("ascii")))
+        else:
+            raise ValueError(f"Неподдерживаемый тип значения: {type(value).__name__}")
+
+    encode(instance.value)
+    if len(consts) > _ARG_MASK:
+        raise ValueError("Слишком много различных значений для контрольной точки")
+
+    table = json.dumps(consts, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    table += b" " * (-len(table) % 4)
+    if sys.byteorder != "little":
+        words.byteswap()
+    tree = words.tobytes()
+    checksum = zlib.crc32(tree, zlib.crc32(table))
+    header = HEADER.pack(MAGIC, VERSION, schema_digest, source[0], source[1],
+                         len(table), len(words), checksum)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(table)
+        f.write(tree)
+    os.replace(tmp_path, path)
+    return HEADER.size + len(table) + len(tree)
+
+
+def read_checkpoint(path, data_model, schema_digest, source):
+    """Восстанавливает экземпляр из контрольной точки
+
+    ValueError, если файл поврежден или не соответствует схеме или JSON файлу.
+    """
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if len(mm) < HEADER.size:
+            raise ValueError("файл поврежден")
+        magic, version, digest, size, mtime, table_len, count, checksum = HEADER.unpack_from(mm)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"неподдерживаемый формат (версия {version})")
+        if digest != schema_digest:
+            raise ValueError("изменилась YANG схема")
+        if (size, mtime) != tuple(source):
+            raise ValueError("JSON файл данных изменился после контрольной точки")
+        if len(mm) != HEADER.size + table_len + 4 * count:
+            raise ValueError("файл поврежден")
+
+        with memoryview(mm) as view, view[HEADER.size:HEADER.size + table_len] as table, \
+                view[HEADER.size + table_len:] as tree:
+            if zlib.crc32(tree, zlib.crc32(table)) != checksum:
+                raise ValueError("не совпадает контрольная сумма")
+            consts = json.loads(bytes(table))
+            if sys.byteorder == "little":
+                with tree.cast("I") as ints:
+                    words = ints.tolist()
+            else:
+                words = array("I", tree)
+                words.byteswap()
+
+    # Сборщик циклов не нужен для создаваемого дерева, а его проходы
+    # по растущему числу объектов заметно замедляют восстановление
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        value = _decode(words, consts)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return RootNode(value, data_model.schema, data_model.schema_data, value.timestamp)
+
+
+def _decode(words, consts):
+    """Строит компактное дерево значений yangson из массива слов"""
+    next_word = iter(words).__next__
+    new_object, update = dict.__new__, dict.update
+    new_array, extend = list.__new__, list.extend
+    routes, tuples = {}, {}
+
+    def decode(word):
+        if word <= _ARG_MASK:
+            return consts[word]
+        tag, arg = word >> _ARG_BITS, word & _ARG_MASK
+        if tag == _OBJECT:
+            members = {}
+            for _ in range(arg):
+                name = consts[next_word()]
+                word = next_word()
+                members[name] = consts[word] if word <= _ARG_MASK else decode(word)
+            # Без __init__ и __setitem__ ObjectValue, которые обновляют метку времени
+            value = new_object(CompactObjectValue)
+            update(value, members)
+            return value
+        if tag == _ARRAY:
+            value = new_array(CompactArrayValue)
+            extend(value, [decode(next_word()) for _ in range(arg)])
+            return value
+        if tag == _TUPLE:
+            value = tuple(decode(next_word()) for _ in range(arg))
+            return tuples.setdefault(value, value)
+        if tag == _DECIMAL:
+            return Decimal(consts[arg])
+        if tag == _ROUTE:
+            text = consts[arg]
+            if text not in routes:
+                routes[text] = InstanceIdParser(text).parse()
+            return routes[text]
+        if tag == _NONE:
+            return None
+        if tag == _TRUE:
+            return True
+        if tag == _FALSE:
+            return False
+        if tag == _BYTES:
+            return b64decode(consts[arg])
+        raise ValueError(f"неизвестный тег {tag}")
+
+    return decode(next_word())
+
+
+class DatastoreCheckpoint:
+    """Периодически сохраняет данные в двоичную контрольную точку для быстрого перезапуска"""
+
+    def __init__(self, yang_manager, path, interval=60):
+        self.yang_manager = yang_manager
+        self.path = path
+        self.interval = interval
+        self.last_saved = None
+        self.last_error = None
+        self._saved_datastore = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Запускает фоновое сохранение"""
+        self._thread = threading.Thread(target=self._run, name="checkpoint", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Останавливает фоновое сохранение и сохраняет последние изменения"""
+        self._stop.set()
+        self.save()
+
+    def save(self):
+        """Сохраняет контрольную точку, если данные изменились с прошлого сохранения"""
+        if self.yang_manager.read_only:
+            # Данные реплики не соответствуют ее JSON файлу
+            return False
+        datastore, digest, source = self.yang_manager.get_checkpoint_state()
+        if datastore is self._saved_datastore:
+            return False
+        try:
+            write_checkpoint(self.path, datastore, digest, source)
+            self._saved_datastore = datastore
+            self.last_saved = datetime.now()
+            self.last_error = None
+            return True
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"Не удалось сохранить контрольную точку: {e}")
+            return False
+
+    def _run(self):
+        self.save()
+        while not self._stop.wait(self.interval):
+            self.save()
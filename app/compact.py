@@ -0,0 +1,249 @@
+import gc
+import sys
+from datetime import datetime
+from decimal import Decimal
+from yangson.datatype import (
+    BooleanType, EnumerationType, Int8Type, Int16Type, Int32Type,
+    StringType, Uint8Type, Uint16Type, Uint32Type
+)
+from yangson.instance import ArrayEntry
+from yangson.instvalue import ArrayValue, ObjectValue, StructuredValue
+from yangson.schemanode import InternalNode, LeafListNode, ListNode, TerminalNode
+
+# Типы листьев, у которых значение yangson совпадает с сырым значением JSON
+_RAW_TYPES = (
+    StringType, EnumerationType, BooleanType, Int8Type, Int16Type, Int32Type,
+    Uint8Type, Uint16Type, Uint32Type
+)
+
+# Метка времени компактных узлов: данные хранилища неизменяемы, а свою
+# метку (словарь атрибутов и datetime, ~350 байт) yangson создает только
+# для новых узлов правки
+_COMPACTED = datetime.now()
+
+# Кортежи identityref, bits и empty: их немного, и они общие для всех правок
+_shared_tuples = {}
+
+
+class CompactObjectValue(ObjectValue):
+    """ObjectValue без собственного словаря атрибутов"""
+
+    timestamp = _COMPACTED
+
+    def __eq__(self, val):
+        # Общие поддеревья отдаются читателям как сырые данные и
+        # сравниваются с обычными словарями по содержимому
+        if not isinstance(val, ObjectValue):
+            return dict.__eq__(self, val)
+        return hash(self) == hash(val)
+
+    __hash__ = ObjectValue.__hash__
+
+
+class CompactArrayValue(ArrayValue):
+    """ArrayValue без собственного словаря атрибутов"""
+
+    timestamp = _COMPACTED
+
+    def __eq__(self, val):
+        if not isinstance(val, ArrayValue):
+            return list.__eq__(self, val)
+        return hash(self) == hash(val)
+
+    __hash__ = ArrayValue.__hash__
+
+
+_COMPACT_TYPES = (CompactObjectValue, CompactArrayValue)
+
+
+def compact(value):
+    """Возвращает компактное дерево значений yangson
+
+    Имена членов интернируются, одинаковые строки, числа и кортежи
+    (identityref, enum) становятся одним объектом, узлы - экземплярами
+    CompactObjectValue/CompactArrayValue. Уже компактные поддеревья
+    переиспользуются, поэтому после правки перестраивается только ее путь.
+    """
+    strings, numbers = {}, {}
+    intern = sys.intern
+    new_object, new_array = dict.__new__, list.__new__
+    update, extend = dict.update, list.extend
+
+    def scalar(item):
+        kind = type(item)
+        if kind is str:
+            shared = strings.get(item)
+            if shared is None:
+                # Копия, а не исходная строка: исходные лежат в блоках памяти
+                # вперемешку с освобождаемыми сырыми данными и не дают
+                # вернуть эти блоки системе
+                shared = strings[item] = item.encode("utf-8", "surrogatepass").decode(
+                    "utf-8", "surrogatepass")
+            return shared
+        if kind is tuple:
+            shared = _shared_tuples.get(item)
+            if shared is None:
+                shared = _shared_tuples[item] = tuple(scalar(part) for part in item)
+            return shared
+        if kind is int or kind is Decimal:
+            return numbers.setdefault((kind, item), item)
+        return item
+
+    def walk(item):
+        kind = type(item)
+        if kind in _COMPACT_TYPES:
+            return item
+        if isinstance(item, ObjectValue):
+            result = new_object(CompactObjectValue)
+            update(result, {intern(name): walk(member) for name, member in item.items()})
+            return result
+        if isinstance(item, ArrayValue):
+            result = new_array(CompactArrayValue)
+            extend(result, [walk(entry) for entry in item])
+            return result
+        return scalar(item)
+
+    # Как и при чтении контрольной точки: проходы сборщика циклов по
+    # растущему числу новых объектов только замедляют построение
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return walk(value)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def compact_instance(instance):
+    """Возвращает корневой экземпляр с компактным деревом значений"""
+    if type(instance.value) is CompactObjectValue:
+        return instance
+    return instance.update(compact(instance.value))
+
+
+class RawConverter:
+    """Преобразует значения yangson в сырые значения JSON без экземпляров узлов
+
+    Поддеревья, в которых все листья хранятся в сыром виде (строки, enum,
+    boolean, целые до 32 бит), при чтении отдаются как есть, без копирования.
+    Копии строятся только для узлов с преобразуемыми значениями (identityref,
+    decimal64 и т.п.). Кэш схемы привязан к модели данных.
+    """
+
+    def __init__(self):
+        self._children = {}
+        self._ready = {}
+
+    def instance_to_raw(self, instance, share=True):
+        """Сырое значение экземпляра; share=False - независимая изменяемая копия"""
+        if isinstance(instance, ArrayEntry):
+            return self.entry_to_raw(instance.value, instance.schema_node, share)
+        return self.to_raw(instance.value, instance.schema_node, share)
+
+    def entry_to_raw(self, value, list_node, share=True):
+        """Сырое значение записи списка (схема записи - схема всего списка)"""
+        return self._object(value, list_node, share)
+
+    def to_raw(self, value, schema_node, share=True):
+        """Сырое значение члена объекта со схемой schema_node"""
+        if self.is_ready(schema_node):
+            if share:
+                return value
+            if isinstance(schema_node, LeafListNode):
+                return list(value)
+            if isinstance(schema_node, TerminalNode):
+                return value
+        if isinstance(schema_node, ListNode):
+            return [self._object(entry, schema_node, share) for entry in value]
+        if isinstance(schema_node, LeafListNode):
+            convert = schema_node.type.to_raw
+            return [convert(item) for item in value]
+        if isinstance(schema_node, TerminalNode):
+            return schema_node.type.to_raw(value)
+        if isinstance(schema_node, InternalNode) and isinstance(value, ObjectValue):
+            return self._object(value, schema_node, share)
+        return value
+
+    def is_ready(self, schema_node):
+        """True, если значения поддерева уже совпадают с сырыми"""
+        ready = self._ready.get(schema_node)
+        if ready is None:
+            if isinstance(schema_node, TerminalNode):
+                ready = isinstance(schema_node.type, _RAW_TYPES)
+            elif isinstance(schema_node, InternalNode):
+                ready = all(self.is_ready(child) for child in schema_node.data_children())
+            else:
+                ready = False
+            self._ready[schema_node] = ready
+        return ready
+
+    def _object(self, value, schema_node, share):
+        if share and self.is_ready(schema_node):
+            return value
+        children = self._children.get(schema_node)
+        if children is None:
+            children = self._children[schema_node] = {}
+        result = {}
+        for name, member in value.items():
+            child = children.get(name)
+            if child is None:
+                module, _, local = name.rpartition(":")
+                child = schema_node.get_data_child(local, module or schema_node.ns)
+                if child is None:
+                    result[name] = member
+                    continue
+                children[name] = child
+            result[name] = self.to_raw(member, child, share)
+        return result
+
+
+def memory_report(instance):
+    """Оценивает память данных: байт на запись каждого списка
+
+    Запись учитывает свой объект, значения листьев и контейнеры вложенных
+    массивов; записи вложенных списков учитываются в своих списках. Общие
+    (интернированные) значения учитываются один раз.
+    """
+    seen = set()
+    lists = {}
+
+    def own_size(item):
+        if id(item) in seen:
+            return 0
+        seen.add(id(item))
+        size = sys.getsizeof(item)
+        if isinstance(item, StructuredValue) and type(item) not in _COMPACT_TYPES:
+            size += sys.getsizeof(item.__dict__) + sys.getsizeof(item.timestamp)
+        elif isinstance(item, tuple):
+            size += sum(own_size(part) for part in item)
+        return size
+
+    def walk(value, schema_node, path):
+        """Размер объекта без записей вложенных списков"""
+        size = own_size(value)
+        for name, member in value.items():
+            size += own_size(name)
+            module, _, local = name.rpartition(":")
+            child = schema_node.get_data_child(local, module or schema_node.ns) \
+                if isinstance(schema_node, InternalNode) else None
+            child_name = child.iname() if child is not None else name
+            child_path = f"{path}/{child_name}" if path else child_name
+            if isinstance(child, ListNode) and isinstance(member, list):
+                size += own_size(member)
+                stats = lists.setdefault(child_path, {"entries": 0, "bytes": 0})
+                for entry in member:
+                    stats["entries"] += 1
+                    stats["bytes"] += walk(entry, child, child_path)
+            elif isinstance(member, dict):
+                size += walk(member, child, child_path)
+            elif isinstance(member, list):
+                size += own_size(member) + sum(own_size(item) for item in member)
+            else:
+                size += own_size(member)
+        return size
+
+    total = walk(instance.value, instance.schema_node, "")
+    total += sum(stats["bytes"] for stats in lists.values())
+    for stats in lists.values():
+        stats["bytes-per-entry"] = round(stats["bytes"] / stats["entries"]) if stats["entries"] else 0
+    return {"total-bytes": total, "lists": lists}
@@ -0,0 +1,87 @@
+class DerivedState:
+    """Реестр производных config false узлов, поддерживаемых инкрементально.
+
+    Каждый узел описывается путем (имена узлов через '/', без ключей) и
+    функцией обновления update(value, delta) -> value, где delta - словарь
+    {путь списка: изменение числа записей} для одной зафиксированной правки.
+    Полный обход данных выполняется только при загрузке (compute).
+    """
+
+    def __init__(self):
+        self.nodes = {}
+
+    def register(self, path, update, initial, lists=()):
+        """Регистрирует производный узел
+
+        initial - начальное значение, lists - пути списков, от которых
+        зависит узел (для них считается начальное число записей).
+        """
+        self.nodes[path] = {
+            "segments": tuple(path.split("/")),
+            "update": update,
+            "initial": initial,
+            "lists": tuple(lists)
+        }
+
+    def compute(self, raw_data):
+        """Вычисляет значения полным обходом данных (только при загрузке)"""
+        values = {}
+        for path, node in self.nodes.items():
+            delta = {
+                list_path: count_entries(raw_data, list_path.split("/"))
+                for list_path in node["lists"]
+            }
+            values[path] = node["update"](node["initial"], delta)
+        return values
+
+    def apply(self, values, delta):
+        """Возвращает новые значения с учетом изменений одной правки"""
+        if not delta:
+            return values
+        return {path: node["update"](values.get(path, node["initial"]), delta)
+                for path, node in self.nodes.items()}
+
+    def lookup(self, values, segments):
+        """Возвращает значение узла по пути или None"""
+        path = "/".join(segments)
+        if path in self.nodes:
+            return values.get(path, self.nodes[path]["initial"])
+        return None
+
+    def inject(self, values, raw_value, target, depth=None):
+        """Добавляет производные узлы в ответ для ресурса с путем target"""
+        if not isinstance(raw_value, dict):
+            return raw_value
+        target = tuple(target)
+        # Ответ может разделять объекты с хранилищем: объекты на пути к
+        # производному узлу копируются, а не изменяются
+        raw_value = dict(raw_value)
+        for path, node in self.nodes.items():
+            segments = node["segments"]
+            if segments[:len(target)] != target or len(segments) == len(target):
+                continue
+            # Целевой ресурс - уровень 1, узел - на len(segments) - len(target) + 1
+            if depth is not None and len(segments) - len(target) + 1 > depth:
+                continue
+
+            parent = raw_value
+            for name in segments[len(target):-1]:
+                child = parent.get(name)
+                if not isinstance(child, dict):
+                    break
+                parent[name] = dict(child)
+                parent = parent[name]
+            else:
+                parent[segments[-1]] = values.get(path, node["initial"])
+        return raw_value
+
+
+def count_entries(raw_data, segments):
+    """Считает записи списка по пути из имен узлов (обходит промежуточные списки)"""
+    if not segments:
+        return len(raw_data) if isinstance(raw_data, list) else 0
+    if isinstance(raw_data, list):
+        return sum(count_entries(entry, segments) for entry in raw_data)
+    if isinstance(raw_data, dict) and segments[0] in raw_data:
+        return count_entries(raw_data[segments[0]], segments[1:])
+    return 0
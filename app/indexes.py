@@ -0,0 +1,204 @@
+from bisect import bisect_left, bisect_right
+
+
+class SecondaryIndexes:
+    """Реестр вторичных индексов по неключевым листьям записей списков.
+
+    Индекс листа - пара ({значение: {ключ записи верхнего списка: frozenset
+    путей ключей}}, отсортированные значения). Путь ключей записи - кортеж
+    ключей записей всех списков от корня до нее. Значения индексов не
+    изменяются: правка копирует только словари затронутых значений и
+    множества затронутых записей верхнего списка, разделяя остальное с
+    прежними индексами, поэтому читатели видят индексы своего снимка данных.
+    """
+
+    def __init__(self):
+        self.indexes = {}
+        # Ключи списков, листья по путям их объектов и пути всех узлов,
+        # через которые проходит обход до индексированных листьев
+        self.lists = {}
+        self.leaves = {}
+        self.prefixes = set()
+
+    def register(self, path, lists):
+        """Регистрирует индекс листа path
+
+        lists - пары (путь списка, имена ключей) для списков на пути к листу.
+        """
+        segments = path.split("/")
+        for i in range(1, len(segments)):
+            self.prefixes.add("/".join(segments[:i]))
+        for list_path, key_names in lists:
+            self.lists[list_path] = tuple(key_names)
+        parent, _, leaf = path.rpartition("/")
+        self.leaves.setdefault(parent, {})[leaf] = path
+        self.indexes[path] = tuple(list_path for list_path, _ in lists)
+
+    def collect(self, value, path, keys):
+        """Возвращает (путь индекса, значение, путь ключей) листьев поддерева
+
+        value - объект, запись или массив записей по пути path (имена узлов
+        через '/'), keys - путь ключей ближайшей записи, содержащей value.
+        """
+        found = []
+        if not self.indexes or (path and path not in self.prefixes):
+            return found
+        key_names = self.lists.get(path)
+        if key_names is not None and isinstance(value, list):
+            for entry in value:
+                self._collect(entry, path, keys + (tuple(entry.get(k) for k in key_names),), found)
+        elif isinstance(value, dict):
+            self._collect(value, path, keys, found)
+        return found
+
+    def _collect(self, value, path, keys, found):
+        leaves = self.leaves.get(path)
+        if leaves:
+            for name, index_path in leaves.items():
+                if name in value:
+                    member = value[name]
+                    # leaf-list индексируется по каждому значению
+                    for item in (member if isinstance(member, list) else (member,)):
+                        found.append((index_path, item, keys))
+        for name, member in value.items():
+            child_path = f"{path}/{name}" if path else name
+            if child_path not in self.prefixes:
+                continue
+            key_names = self.lists.get(child_path)
+            if key_names is not None and isinstance(member, list):
+                for entry in member:
+                    self._collect(entry, child_path, keys + (tuple(entry.get(k) for k in key_names),),
+                                  found)
+            elif isinstance(member, dict):
+                self._collect(member, child_path, keys, found)
+
+    def compute(self, value):
+        """Строит индексы полным обходом данных (при загрузке и регистрации)"""
+        buckets = {path: {} for path in self.indexes}
+        for path, item, keys in self.collect(value, "", ()):
+            buckets[path].setdefault(item, {}).setdefault(keys[0], set()).add(keys)
+        return {
+            path: self._freeze({
+                item: {first: frozenset(group) for first, group in groups.items()}
+                for item, groups in values.items()
+            })
+            for path, values in buckets.items()
+        }
+
+    def apply(self, values, removed, added):
+        """Возвращает индексы после правки
+
+        removed и added - результаты collect для поддерева правки до и после.
+        Совпадающие записи (не изменившиеся листья поддерева) сокращаются.
+        """
+        changes = {}
+        for sign, found in ((0, removed), (1, added)):
+            for path, item, keys in found:
+                changes.setdefault(path, {}).setdefault(item, (set(), set()))[sign].add(keys)
+
+        result = values
+        for path, items in changes.items():
+            buckets, ordered = values[path]
+            updated = None
+            for item, (minus, plus) in items.items():
+                minus, plus = minus - plus, plus - minus
+                if not minus and not plus:
+                    continue
+                if updated is None:
+                    updated = dict(buckets)
+                groups = dict(updated.get(item, {}))
+                for first in {keys[0] for keys in minus | plus}:
+                    group = (groups.get(first, frozenset())
+                             - {keys for keys in minus if keys[0] == first}) \
+                        | {keys for keys in plus if keys[0] == first}
+                    if group:
+                        groups[first] = frozenset(group)
+                    else:
+                        groups.pop(first, None)
+                if groups:
+                    updated[item] = groups
+                else:
+                    updated.pop(item, None)
+            if updated is not None:
+                if result is values:
+                    result = dict(values)
+                # Порядок значений строится заново, только если изменился их набор
+                result[path] = (updated, ordered) if updated.keys() == buckets.keys() \
+                    else self._freeze(updated)
+        return result
+
+    def select(self, values, path, operator, literal, keys=()):
+        """Возвращает ключи записей списка, содержащих лист path, удовлетворяющий условию
+
+        keys - путь ключей записи, внутри которой находится список (пустой
+        для списка верхнего уровня).
+        """
+        buckets, ordered = values[path]
+        if operator == "=":
+            matched = [literal] if literal in buckets else []
+        elif ordered is None:
+            # Значения разных типов не упорядочены: проверяем каждое
+            matched = [item for item in buckets if compare(item, operator, literal)]
+        else:
+            try:
+                if operator == ">":
+                    matched = ordered[bisect_right(ordered, literal):]
+                elif operator == ">=":
+                    matched = ordered[bisect_left(ordered, literal):]
+                elif operator == "<":
+                    matched = ordered[:bisect_left(ordered, literal)]
+                else:
+                    matched = ordered[:bisect_right(ordered, literal)]
+            except TypeError:
+                return set()
+        depth = len(keys)
+        result = set()
+        for item in matched:
+            groups = buckets[item]
+            if not depth:
+                result.update(groups)
+                continue
+            group = groups.get(keys[0])
+            if group:
+                result.update(entry[depth] for entry in group if entry[:depth] == keys)
+        return result
+
+    def _freeze(self, buckets):
+        try:
+            ordered = sorted(buckets)
+        except TypeError:
+            ordered = None
+        return buckets, ordered
+
+
+def compare(value, operator, literal):
+    """Сравнивает значение листа со значением условия (False для несравнимых)"""
+    try:
+        if operator == "=":
+            return value == literal
+        if operator == "<":
+            return value < literal
+        if operator == "<=":
+            return value <= literal
+        if operator == ">":
+            return value > literal
+        return value >= literal
+    except TypeError:
+        return False
+
+
+def leaf_values(node, segments):
+    """Значения листа по относительному пути (через вложенные списки)"""
+    if not isinstance(node, dict) or segments[0] not in node:
+        return
+    member = node[segments[0]]
+    if len(segments) == 1:
+        if isinstance(member, list):
+            yield from member
+        else:
+            yield member
+    elif isinstance(member, list):
+        for entry in member:
+            yield from leaf_values(entry, segments[1:])
+    else:
+        yield from leaf_values(member, segments[1:])
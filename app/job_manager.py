@@ -0,0 +1,220 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from .utils.exceptions import RESTCONFError, NotFoundError, ServiceUnavailableError
+from .utils.utils import create_error_response
+
+
+class Job:
+    """Фоновое выполнение длительной RPC операции"""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+    TIMEOUT = "timeout"
+
+    FINAL_STATES = (COMPLETED, FAILED, CANCELLED, TIMEOUT)
+
+    def __init__(self, rpc_name, timeout):
+        self.id = uuid.uuid4().hex
+        self.rpc_name = rpc_name
+        self.state = self.QUEUED
+        self.output = None
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.deadline = self.submitted + timeout if timeout else None
+        self.future = None
+        self._lock = threading.Lock()
+        # Подписчики на завершение задания (ожидание ?wait= в потоке или цикле событий)
+        self._callbacks = set()
+
+    def is_final(self):
+        """Проверяет, завершено ли задание"""
+        return self.state in self.FINAL_STATES
+
+    def is_executing(self):
+        """Проверяет, занимает ли задание место в пуле (ждет или выполняется его поток)"""
+        return self.future is not None and not self.future.done()
+
+    def start(self):
+        """Переводит задание в состояние выполнения, если оно еще актуально"""
+        with self._lock:
+            self._check_deadline()
+            if self.state != self.QUEUED:
+                return False
+            self.state = self.RUNNING
+            self.started = time.time()
+            return True
+
+    def finish(self, state, output=None, error=None):
+        """Завершает задание; результат игнорируется, если задание уже завершено"""
+        with self._lock:
+            if self.is_final():
+                return False
+            self.state = state
+            self.output = output
+            self.error = error
+            self.finished = time.time()
+            self._set_done()
+            return True
+
+    def cancel(self):
+        """Отменяет задание"""
+        if self.future is not None:
+            self.future.cancel()
+        return self.finish(self.CANCELLED)
+
+    def refresh(self):
+        """Обновляет состояние с учетом истекшего таймаута"""
+        with self._lock:
+            self._check_deadline()
+
+    def subscribe(self, callback):
+        """Подписывает callback() на завершение задания; возвращает функцию отписки"""
+        with self._lock:
+            self._callbacks.add(callback)
+        return lambda: self._callbacks.discard(callback)
+
+    def wait_time(self, timeout):
+        """Время ожидания завершения: не дольше timeout и не позже срока выполнения"""
+        if self.deadline is not None:
+            timeout = min(timeout, self.deadline - time.time())
+        return max(0, timeout)
+
+    def _set_done(self):
+        """Будит подписчиков завершения (вызывается под блокировкой)"""
+        for callback in list(self._callbacks):
+            callback()
+
+    def _check_deadline(self):
+        """Помечает задание как просроченное (вызывается под блокировкой)"""
+        if self.is_final() or self.deadline is None or time.time() < self.deadline:
+            return
+        if self.future is not None:
+            self.future.cancel()
+        self.state = self.TIMEOUT
+        self.error = RESTCONFError(
+            "application", "operation-failed",
+            f"Превышено время выполнения RPC '{self.rpc_name}'", 500
+        )
+        self.finished = time.time()
+        self._set_done()
+
+    def to_dict(self):
+        """Возвращает представление задания для ответа клиенту"""
+        self.refresh()
+        job = {
+            "id": self.id,
+            "operation": self.rpc_name,
+            "status": self.state,
+            "submitted": _format_time(self.submitted),
+        }
+        if self.started is not None:
+            job["started"] = _format_time(self.started)
+        if self.finished is not None:
+            job["finished"] = _format_time(self.finished)
+        if self.state == self.COMPLETED:
+            job["output"] = self.output
+        elif self.error is not None:
+            job["errors"] = create_error_response(self.error)["ietf-restconf:errors"]
+        return {"job": job}
+
+
+class JobManager:
+    """Выполняет длительные RPC операции в ограниченном пуле потоков"""
+
+    def __init__(self, long_running=None, workers=4, max_queue=16, timeout=30, job_ttl=300):
+        self.long_running = set(long_running or [])
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.job_ttl = job_ttl
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rpc-job")
+        self.jobs = {}
+        self._lock = threading.Lock()
+
+    def is_long_running(self, rpc_name):
+        """Проверяет, должна ли RPC операция выполняться асинхронно"""
+        return rpc_name in self.long_running
+
+    def submit(self, rpc_name, func, *args):
+        """Ставит RPC операцию в очередь и возвращает созданное задание"""
+        with self._lock:
+            self._purge_finished()
+            # Сроки проверяются до подсчета: просроченные задания в очереди
+            # отменяются, а выполняющиеся считаются, пока занят их поток
+            for job in self.jobs.values():
+                job.refresh()
+            active = sum(1 for job in self.jobs.values() if job.is_executing())
+            if active >= self.workers + self.max_queue:
+                raise ServiceUnavailableError(
+                    error_message=f"Очередь RPC заданий переполнена ({active})",
+                    retry_after=max(1, int(self.timeout or 1))
+                )
+
+            job = Job(rpc_name, self.timeout)
+            self.jobs[job.id] = job
+            job.future = self.executor.submit(self._run, job, func, *args)
+            return job
+
+    def get_job(self, job_id):
+        """Возвращает задание по идентификатору"""
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise NotFoundError(
+                error_tag="invalid-value",
+                error_message=f"Задание '{job_id}' не найдено"
+            )
+        return job
+
+    def list_jobs(self):
+        """Возвращает список всех известных заданий"""
+        with self._lock:
+            self._purge_finished()
+            jobs = list(self.jobs.values())
+        return {"jobs": {"job": [job.to_dict()["job"] for job in jobs]}}
+
+    def cancel_job(self, job_id):
+        """Отменяет задание по идентификатору"""
+        job = self.get_job(job_id)
+        job.cancel()
+        return job
+
+    def shutdown(self):
+        """Отменяет ожидающие задания и останавливает пул"""
+        for job in list(self.jobs.values()):
+            if job.state == Job.QUEUED:
+                job.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job, func, *args):
+        """Выполняет задание в рабочем потоке"""
+        if not job.start():
+            return
+        try:
+            job.finish(Job.COMPLETED, output=func(*args))
+        except RESTCONFError as e:
+            job.finish(Job.FAILED, error=e)
+        except Exception as e:
+            job.finish(Job.FAILED, error=RESTCONFError(
+                "application", "operation-failed", f"Ошибка выполнения RPC: {str(e)}", 500
+            ))
+
+    def _purge_finished(self):
+        """Удаляет завершенные задания старше job_ttl (вызывается под блокировкой)"""
+        now = time.time()
+        for job_id in [job_id for job_id, job in self.jobs.items()
+                       if job.is_final() and not job.is_executing() and job.finished is not None
+                       and now - job.finished > self.job_ttl]:
+            del self.jobs[job_id]
+
+
+def _format_time(timestamp):
+    """Форматирует время в ISO 8601"""
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat()
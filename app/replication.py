@@ -0,0 +1,151 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from urllib.parse import urlencode
+from .utils.exceptions import RESTCONFError, GoneError
+
+
+class ReplicaFollower:
+    """Поддерживает реплику только для чтения по журналу изменений основного сервера"""
+
+    def __init__(self, yang_manager, primary_url, max_lag=1000, retry_interval=1.0,
+                 stream_timeout=10.0):
+        self.yang_manager = yang_manager
+        self.primary_url = primary_url.rstrip("/")
+        self.max_lag = max_lag
+        self.retry_interval = retry_interval
+        self.stream_timeout = stream_timeout
+
+        self.state = "bootstrapping"
+        self.primary_seq = 0
+        self.last_applied_time = None
+        self.lag_seconds = 0.0
+        self.resyncs = 0
+        self.last_error = None
+        self._stop = threading.Event()
+        self._thread = None
+
+        yang_manager.read_only = True
+        yang_manager.replica = self
+
+    def bootstrap(self):
+        """Загружает снимок основного сервера, повторяя попытки до успеха"""
+        while not self._stop.is_set():
+            try:
+                self._load_snapshot()
+                return True
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Не удалось получить снимок с {self.primary_url}: {e}")
+                self._stop.wait(self.retry_interval)
+        return False
+
+    def start(self):
+        """Запускает фоновое применение журнала изменений"""
+        self._thread = threading.Thread(target=self._follow, name="replica-follower", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Останавливает репликацию"""
+        self._stop.set()
+
+    def get_status(self):
+        """Возвращает состояние репликации и задержку"""
+        applied = self.yang_manager.change_seq
+        return {
+            "mode": "replica",
+            "primary": self.primary_url,
+            "state": self.state,
+            "epoch": self.yang_manager.change_epoch,
+            "applied-seq": applied,
+            "primary-seq": self.primary_seq,
+            "lag-changes": max(0, self.primary_seq - applied),
+            "lag-seconds": round(self.lag_seconds, 3),
+            "resyncs": self.resyncs,
+            "last-error": self.last_error
+        }
+
+    def _follow(self):
+        """Читает поток изменений; при разрыве переподключается, при отставании - ресинхронизируется"""
+        while not self._stop.is_set():
+            try:
+                self._stream_changes()
+            except RESTCONFError as e:
+                # Пропуск в журнале или изменение, которое не удалось применить
+                self._resync(str(e))
+            except Exception as e:
+                self.state = "disconnected"
+                self.last_error = str(e)
+                self._stop.wait(self.retry_interval)
+
+    def _stream_changes(self):
+        """Применяет изменения из потока /admin/changes"""
+        query = urlencode({"since": self.yang_manager.change_seq, "epoch": self.yang_manager.change_epoch})
+        url = f"{self.primary_url}/admin/changes?{query}"
+        try:
+            response = urllib.request.urlopen(url, timeout=self.stream_timeout)
+        except urllib.error.HTTPError as e:
+            if e.code == 410:
+                raise GoneError(_error_message(json.loads(e.read())))
+            raise
+
+        with response:
+            self.state = "streaming"
+            for line in response:
+                if self._stop.is_set():
+                    return
+                if not line.strip():
+                    continue
+                message = json.loads(line)
+
+                if "ietf-restconf:errors" in message:
+                    raise GoneError(_error_message(message))
+
+                self.primary_seq = max(self.primary_seq, message.get("head", 0))
+                change = message.get("change")
+                if change is not None:
+                    self.yang_manager.apply_change(change)
+                    self.last_applied_time = time.time()
+                    self.lag_seconds = max(0.0, self.last_applied_time - change["time"])
+                elif self.yang_manager.change_seq >= self.primary_seq:
+                    self.lag_seconds = 0.0
+
+                if self.primary_seq - self.yang_manager.change_seq > self.max_lag:
+                    raise GoneError(
+                        f"Отставание {self.primary_seq - self.yang_manager.change_seq} "
+                        f"превышает допустимое ({self.max_lag})"
+                    )
+        raise ConnectionError("Поток изменений закрыт основным сервером")
+
+    def _resync(self, reason):
+        """Загружает свежий снимок вместо применения журнала"""
+        print(f"Ресинхронизация реплики: {reason}")
+        self.state = "resyncing"
+        self.last_error = reason
+        self.resyncs += 1
+        try:
+            self._load_snapshot()
+        except Exception as e:
+            self.state = "disconnected"
+            self.last_error = str(e)
+            self._stop.wait(self.retry_interval)
+
+    def _load_snapshot(self):
+        """Получает и загружает снимок основного сервера"""
+        with urllib.request.urlopen(f"{self.primary_url}/admin/snapshot", timeout=self.stream_timeout) as response:
+            snapshot = json.load(response)
+        self.yang_manager.load_snapshot(snapshot)
+        self.primary_seq = snapshot["seq"]
+        self.lag_seconds = 0.0
+        self.state = "synchronized"
+        print(f"Реплика загрузила снимок {self.primary_url} (позиция {snapshot['seq']})")
+
+
+def _error_message(error_response):
+    """Извлекает текст первой ошибки из ответа RESTCONF"""
+    try:
+        return error_response["ietf-restconf:errors"]["error"][0]["error-message"]
+    except (KeyError, IndexError, TypeError):
+        return str(error_response)
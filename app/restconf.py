@@ -1,20 +1,93 @@
 import json
+import threading
+import time
+from collections import namedtuple
 from http.server import BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
-from .utils.exceptions import RESTCONFError, BadRequestError, NotFoundError
-from .utils.utils import parse_resource_path, create_error_response
+from .utils.exceptions import RESTCONFError, BadRequestError, NotFoundError, ServiceUnavailableError
+from .utils.request_body import RequestBody, parse_json_stream
+from .utils.utils import parse_resource_path, parse_query_params, create_error_response
+
+# Интервал пустых сообщений в потоке изменений, по ним реплика оценивает задержку
+CHANGE_FEED_HEARTBEAT = 1.0
+# Ограничения размера тела по умолчанию: правки данных и входы RPC/batch
+DEFAULT_BODY_LIMITS = {"data": 256 * 1024 * 1024, "rpc": 1024 * 1024}
+# Таймаут одной операции с сокетом клиента (чтение запроса и тела, отправка ответа)
+REQUEST_TIMEOUT = 60
+
+# Ожидание события внутри обработки запроса: subscribe(callback) возвращает
+# функцию отписки, ready() проверяет, наступило ли событие, resume() продолжает
+# обработку и возвращает следующее ожидание или None
+Wait = namedtuple("Wait", ["subscribe", "ready", "timeout", "resume"])
 
 
 class RESTCONFHandler(BaseHTTPRequestHandler):
     """HTTP обработчик для RESTCONF запросов"""
 
-    def __init__(self, yang_manager, rpc_handler, *args, **kwargs):
+    # Клиент, застрявший посреди запроса, не держит поток дольше таймаута
+    timeout = REQUEST_TIMEOUT
+    # Тело текущего запроса, если обработчик начал его читать, и результат его разбора
+    request_body = None
+    body_data = None
+    # Ожидание, отложенное до цикла событий (асинхронный движок)
+    pending = None
+
+    def __init__(self, yang_manager, rpc_handler, job_manager, admission, body_limits, *args, **kwargs):
         self.yang_manager = yang_manager
         self.rpc_handler = rpc_handler
+        self.job_manager = job_manager
+        self.admission = admission
+        self.body_limits = body_limits
         super().__init__(*args, **kwargs)
 
     def do_GET(self):
         """Обрабатывает GET запросы"""
+        parsed_url = urlparse(self.path)
+        if parsed_url.path == "/admin/metrics":
+            # Метрики доступны и при перегрузке
+            self._send_json_response(self.admission.get_metrics())
+            return
+        if parsed_url.path == "/admin/changes":
+            # Долгоживущий поток для реплик не занимает бюджет допуска
+            self._handle_change_feed(parse_qs(parsed_url.query))
+            return
+        if parsed_url.path.startswith("/restconf/jobs/") and "wait" in parse_qs(parsed_url.query):
+            # Ожидание задания длится до rpc.timeout и тоже идет вне бюджета
+            self._do_get()
+            return
+        self._admitted(self._do_get)
+
+    def do_PATCH(self):
+        """Обрабатывает PATCH запросы"""
+        self._admitted(self._do_patch)
+
+    def do_POST(self):
+        """Обрабатывает POST запросы (RPC операции)"""
+        self._admitted(self._do_post)
+
+    def do_DELETE(self):
+        """Обрабатывает DELETE запросы (удаление данных и отмена заданий)"""
+        self._admitted(self._do_delete)
+
+    def _admitted(self, method):
+        """Выполняет обработчик метода, если запрос прошел контроль допуска"""
+        parsed_url = urlparse(self.path)
+        request_class = self.admission.classify(self.command, parsed_url.path, parsed_url.query)
+        if self.command in ("PATCH", "POST"):
+            # Тело читается до занятия слота: медленная загрузка не держит бюджет записи
+            try:
+                self._read_json_body(self.body_limits["data"] if self.command == "PATCH" else None)
+            except RESTCONFError as e:
+                self._send_error_response(e)
+                return
+        try:
+            with self.admission.admit(self.client_address[0], request_class):
+                method()
+        except ServiceUnavailableError as e:
+            self._send_error_response(e)
+
+    def _do_get(self):
+        """Маршрутизирует GET запросы"""
         try:
             parsed_url = urlparse(self.path)
             path = parsed_url.path
@@ -25,15 +98,28 @@ class RESTCONFHandler(BaseHTTPRequestHandler):
             elif path == "/restconf":
                 self._handle_restconf_root()
             elif path == "/restconf/data":
-                self._handle_get_data("")
+                self._handle_get_data("", parse_query_params(parsed_url.query))
             elif path.startswith("/restconf/data/"):
                 resource_path = parse_resource_path(path)
-                self._handle_get_data(resource_path)
+                self._handle_get_data(resource_path, parse_query_params(parsed_url.query))
             elif path == "/restconf/operations":
                 self._handle_get_operations()
             elif path.startswith("/restconf/operations/"):
                 operation_name = path.replace("/restconf/operations/", "")
                 self._handle_get_operation(operation_name)
+            elif path == "/restconf/jobs":
+                self._send_json_response(self.job_manager.list_jobs())
+            elif path == "/admin/reload":
+                self._send_json_response({"reload": self.yang_manager.reload_status})
+            elif path == "/admin/snapshot":
+                self._send_json_response(self.yang_manager.get_snapshot())
+            elif path == "/admin/replication":
+                self._send_json_response({"replication": self.yang_manager.get_replication_status()})
+            elif path == "/admin/memory":
+                self._send_json_response({"memory": self.yang_manager.get_memory_report()})
+            elif path.startswith("/restconf/jobs/"):
+                job_id = path.replace("/restconf/jobs/", "")
+                self._handle_get_job(job_id, parse_qs(parsed_url.query))
             else:
                 self._send_error_response(NotFoundError(
                     error_message=f"Ресурс не найден: {path}"
@@ -46,8 +132,8 @@ class RESTCONFHandler(BaseHTTPRequestHandler):
                 "protocol", "operation-failed", f"Внутренняя ошибка: {str(e)}", 500
             ))
 
-    def do_PATCH(self):
-        """Обрабатывает PATCH запросы"""
+    def _do_patch(self):
+        """Маршрутизирует PATCH запросы"""
         try:
             parsed_url = urlparse(self.path)
             path = parsed_url.path
@@ -66,23 +152,14 @@ class RESTCONFHandler(BaseHTTPRequestHandler):
                 ))
                 return
 
-            # Читаем данные из тела запроса
-            content_length = int(self.headers.get('Content-Length', 0))
-            if content_length == 0:
+            # Читаем тело по частям (размер проверяется до чтения)
+            patch_data = self._read_json_body(self.body_limits["data"])
+            if patch_data is None:
                 self._send_error_response(BadRequestError(
                     error_message="Тело запроса не может быть пустым"
                 ))
                 return
 
-            raw_data = self.rfile.read(content_length).decode('utf-8')
-            try:
-                patch_data = json.loads(raw_data)
-            except json.JSONDecodeError:
-                self._send_error_response(BadRequestError(
-                    error_message="Неверный формат JSON"
-                ))
-                return
-
             # Определяем путь к ресурсу
             if path == "/restconf/data":
                 resource_path = ""
@@ -103,36 +180,47 @@ class RESTCONFHandler(BaseHTTPRequestHandler):
                 "protocol", "operation-failed", f"Ошибка обработки PATCH: {str(e)}", 500
             ))
 
-    def do_POST(self):
-        """Обрабатывает POST запросы (RPC операции)"""
+    def _do_post(self):
+        """Маршрутизирует POST запросы"""
         try:
             parsed_url = urlparse(self.path)
             path = parsed_url.path
 
+            if path == "/restconf/batch":
+                self._handle_batch_get()
+                return
+
+            if path == "/admin/reload":
+                # Перекомпиляция схемы идет в фоне, запросы обслуживает старая пара
+                status = self.yang_manager.reload_schema()
+                self._send_json_response({"reload": status}, 202, {'Location': "/admin/reload"})
+                return
+
             if not path.startswith("/restconf/operations/"):
                 self._send_error_response(BadRequestError(
-                    error_message="POST разрешен только для /restconf/operations/"
+                    error_message="POST разрешен только для /restconf/operations/ и /restconf/batch"
                 ))
                 return
 
             operation_name = path.replace("/restconf/operations/", "")
 
             # Читаем входные данные
-            content_length = int(self.headers.get('Content-Length', 0))
-            input_data = None
-
-            if content_length > 0:
-                raw_data = self.rfile.read(content_length).decode('utf-8')
-                try:
-                    input_data = json.loads(raw_data)
-                    # Извлекаем данные из input контейнера если есть
-                    if 'input' in input_data:
-                        input_data = input_data['input']
-                except json.JSONDecodeError:
-                    self._send_error_response(BadRequestError(
-                        error_message="Неверный формат JSON"
-                    ))
-                    return
+            input_data = self._read_json_body()
+            # Извлекаем данные из input контейнера если есть
+            if isinstance(input_data, dict) and 'input' in input_data:
+                input_data = input_data['input']
+
+            # Длительные операции выполняются в фоне, клиент получает задание;
+            # неверный вход отклоняется сразу, до постановки в очередь
+            if self.job_manager.is_long_running(operation_name):
+                self.rpc_handler.validate_rpc(operation_name, input_data)
+                job = self.job_manager.submit(
+                    operation_name, self.rpc_handler.execute_rpc, operation_name, input_data
+                )
+                self._send_json_response(job.to_dict(), 202, {
+                    'Location': f"/restconf/jobs/{job.id}"
+                })
+                return
 
             # Вызываем RPC операцию
             result = self.rpc_handler.handle_rpc(operation_name, input_data)
@@ -147,6 +235,35 @@ class RESTCONFHandler(BaseHTTPRequestHandler):
                 "protocol", "operation-failed", f"Ошибка выполнения RPC: {str(e)}", 500
             ))
 
+    def _do_delete(self):
+        """Маршрутизирует DELETE запросы"""
+        try:
+            parsed_url = urlparse(self.path)
+            path = parsed_url.path
+
+            if path.startswith("/restconf/data/"):
+                self.yang_manager.delete_data(parse_resource_path(path))
+                self.send_response(204)  # No Content
+                self.end_headers()
+                return
+
+            if not path.startswith("/restconf/jobs/"):
+                self._send_error_response(BadRequestError(
+                    error_message="DELETE разрешен только для /restconf/data/ и /restconf/jobs/"
+                ))
+                return
+
+            job_id = path.replace("/restconf/jobs/", "")
+            job = self.job_manager.cancel_job(job_id)
+            self._send_json_response(job.to_dict())
+
+        except RESTCONFError as e:
+            self._send_error_response(e)
+        except Exception as e:
+            self._send_error_response(RESTCONFError(
+                "protocol", "operation-failed", f"Ошибка обработки DELETE: {str(e)}", 500
+            ))
+
     def _handle_host_meta(self):
         """Обрабатывает запрос к /.well-known/host-meta"""
         # Формируем XML ответ для host-meta
@@ -172,9 +289,9 @@ class RESTCONFHandler(BaseHTTPRequestHandler):
         }
         self._send_json_response(response)
 
-    def _handle_get_data(self, resource_path):
+    def _handle_get_data(self, resource_path, query=None):
         """Обрабатывает получение данных"""
-        data = self.yang_manager.get_data(resource_path)
+        data = self.yang_manager.get_data(resource_path, query)
 
         if data is None:
             self._send_error_response(NotFoundError(
@@ -183,6 +300,119 @@ class RESTCONFHandler(BaseHTTPRequestHandler):
         else:
             self._send_json_response(data)
 
+    def _handle_batch_get(self):
+        """Обрабатывает пакетное чтение нескольких ресурсов за один запрос"""
+        body = self._read_json_body()
+        entries = body.get("paths") if isinstance(body, dict) else None
+        if not isinstance(entries, list):
+            raise BadRequestError(error_message="Ожидается объект вида {\"paths\": [...]}")
+
+        # Ошибки разбора отдельных элементов возвращаются в их результатах
+        paths, results, requests = [], [], []
+        for entry in entries:
+            if isinstance(entry, str):
+                entry = {"path": entry}
+            if not isinstance(entry, dict) or not isinstance(entry.get("path"), str):
+                raise BadRequestError(error_message=f"Неверный элемент пакета: {entry}")
+            resource_path = parse_resource_path(entry["path"]).strip("/")
+            paths.append(resource_path)
+            try:
+                requests.append((resource_path, parse_query_params(entry.get("query"))))
+                results.append(None)
+            except RESTCONFError as e:
+                results.append(e)
+
+        data = iter(self.yang_manager.get_data_batch(requests))
+        results = [result if result is not None else next(data) for result in results]
+
+        response = []
+        for resource_path, result in zip(paths, results):
+            if isinstance(result, RESTCONFError):
+                response.append({
+                    "path": resource_path,
+                    "status": result.status_code,
+                    "errors": create_error_response(result)["ietf-restconf:errors"]
+                })
+            else:
+                response.append({"path": resource_path, "status": 200, "data": result})
+
+        self._send_json_response({"results": response})
+
+    def _handle_change_feed(self, query):
+        """Передает упорядоченный поток изменений (по одному JSON объекту в строке)"""
+        try:
+            since = int(query.get('since', ['0'])[0])
+            epoch = query.get('epoch', [None])[0]
+            # Проверяем позицию до начала потока, чтобы ошибка ушла обычным ответом
+            self.yang_manager.get_changes(since, epoch)
+        except ValueError:
+            self._send_error_response(BadRequestError(error_message="Неверное значение параметра since"))
+            return
+        except RESTCONFError as e:
+            self._send_error_response(e)
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.flush()
+        self._wait(self._change_feed_wait(since, epoch))
+
+    def _change_feed_wait(self, since, epoch):
+        """Ожидание новых изменений после since (не дольше интервала пустых сообщений)"""
+        yang_manager = self.yang_manager
+        return Wait(yang_manager.subscribe_changes, lambda: yang_manager.change_seq != since,
+                    CHANGE_FEED_HEARTBEAT, lambda: self._send_changes(since, epoch))
+
+    def _send_changes(self, since, epoch):
+        """Отправляет изменения после since (или пустое сообщение) и ждет следующих"""
+        try:
+            try:
+                changes, head = self.yang_manager.get_changes(since, epoch)
+            except RESTCONFError as e:
+                # Журнал переполнен, пока клиент отставал - реплике нужен снимок
+                self.wfile.write((json.dumps(create_error_response(e), ensure_ascii=False) + "\n").encode('utf-8'))
+                return None
+
+            lines = [json.dumps({"change": change, "head": head}, ensure_ascii=False) for change in changes]
+            if not lines:
+                lines.append(json.dumps({"heartbeat": time.time(), "head": head}))
+            self.wfile.write(("\n".join(lines) + "\n").encode('utf-8'))
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            return None
+        return self._change_feed_wait(changes[-1]["seq"] if changes else since, epoch)
+
+    def _wait(self, wait):
+        """Выполняет ожидания и продолжения обработки, блокируя поток обработчика
+
+        Асинхронный движок переопределяет метод: ожидание переносится в цикл
+        событий и не занимает поток пула.
+        """
+        while wait is not None:
+            event = threading.Event()
+            unsubscribe = wait.subscribe(event.set)
+            try:
+                if not wait.ready():
+                    event.wait(wait.timeout)
+            finally:
+                unsubscribe()
+            wait = wait.resume()
+
+    def _read_json_body(self, max_size=None):
+        """Читает и разбирает JSON тело запроса по частям (None для пустого тела)
+
+        Поддерживаются Content-Length и Transfer-Encoding: chunked; тело больше
+        max_size (по умолчанию - лимит для RPC) отклоняется с 413. Тело читается
+        один раз, повторный вызов возвращает уже разобранные данные.
+        """
+        if self.request_body is None:
+            self.request_body = RequestBody(self.rfile, self.headers, max_size or self.body_limits["rpc"])
+            self.body_data = parse_json_stream(self.request_body)
+        return self.body_data
+
     def _handle_get_operations(self):
         """Обрабатывает получение списка операций"""
         operations = self.rpc_handler.get_available_operations()
@@ -193,12 +423,31 @@ class RESTCONFHandler(BaseHTTPRequestHandler):
         # Возвращаем пустой лист для указания что операция доступна
         self._send_json_response(None)
 
-    def _send_json_response(self, data, status=200):
+    def _handle_get_job(self, job_id, query):
+        """Обрабатывает получение состояния задания (wait - ожидание завершения)"""
+        job = self.job_manager.get_job(job_id)
+
+        wait = query.get('wait', ['0'])[0]
+        try:
+            wait = float(wait)
+        except ValueError:
+            raise BadRequestError(error_message=f"Неверное значение параметра wait: {wait}")
+        if wait > 0 and not job.is_final():
+            self._wait(Wait(job.subscribe, job.is_final,
+                            job.wait_time(min(wait, self.job_manager.timeout or wait)),
+                            lambda: self._send_json_response(job.to_dict())))
+            return
+
+        self._send_json_response(job.to_dict())
+
+    def _send_json_response(self, data, status=200, headers=None):
         """Отправляет JSON ответ"""
         json_response = json.dumps(data, indent=2, ensure_ascii=False)
 
         self.send_response(status)
         self.send_header('Content-Type', 'application/yang-data+json')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
         self.send_header('Content-Length', str(len(json_response.encode('utf-8'))))
         self.end_headers()
         self.wfile.write(json_response.encode('utf-8'))
@@ -210,6 +459,8 @@ class RESTCONFHandler(BaseHTTPRequestHandler):
 
         self.send_response(error.status_code)
         self.send_header('Content-Type', 'application/yang-data+json') 
+        if getattr(error, 'retry_after', None):
+            self.send_header('Retry-After', str(error.retry_after))
         self.send_header('Content-Length', str(len(json_response.encode('utf-8'))))
         self.end_headers()
         self.wfile.write(json_response.encode('utf-8'))
@@ -219,8 +470,13 @@ class RESTCONFHandler(BaseHTTPRequestHandler):
         print(f"{self.address_string()} - [{self.log_date_time_string()}] {format % args}")
 
 
-def create_restconf_handler(yang_manager, rpc_handler):
+def create_restconf_handler(yang_manager, rpc_handler, job_manager, admission, body_limits=None,
+                            handler_class=RESTCONFHandler):
     """Фабричная функция для создания обработчика с зависимостями"""
+    body_limits = {**DEFAULT_BODY_LIMITS,
+                   **{name: limit for name, limit in (body_limits or {}).items() if limit is not None}}
+
     def handler(*args, **kwargs):
-        return RESTCONFHandler(yang_manager, rpc_handler, *args, **kwargs)
+        return handler_class(yang_manager, rpc_handler, job_manager, admission, body_limits,
+                             *args, **kwargs)
     return handler
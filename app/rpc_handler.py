@@ -10,17 +10,31 @@ class RPCHandler:
 
     def handle_rpc(self, rpc_name, input_data=None):
         """Обрабатывает вызов RPC операции"""
+        self.validate_rpc(rpc_name, input_data)
+        return self.execute_rpc(rpc_name, input_data)
+
+    def validate_rpc(self, rpc_name, input_data=None):
+        """Проверяет операцию и ее входные параметры до выполнения (ошибки - сразу 4xx)"""
         # Определяем доступные RPC операции
         if rpc_name == "example-jukebox:play":
-            return self._handle_play_rpc(input_data)
+            self._validate_play_input(input_data)
         else:
             raise NotFoundError(
                 error_tag="unknown-element",
                 error_message=f"RPC операция '{rpc_name}' не найдена"
             )
 
-    def _handle_play_rpc(self, input_data):
-        """Обрабатывает RPC операцию 'play'"""
+    def execute_rpc(self, rpc_name, input_data=None):
+        """Выполняет проверенную RPC операцию (в том числе в фоновом задании)"""
+        if rpc_name == "example-jukebox:play":
+            return self._handle_play_rpc(input_data)
+        raise NotFoundError(
+            error_tag="unknown-element",
+            error_message=f"RPC операция '{rpc_name}' не найдена"
+        )
+
+    def _validate_play_input(self, input_data):
+        """Проверяет входные параметры RPC операции 'play'"""
         if not input_data:
             raise BadRequestError(
                 error_tag="missing-element", 
@@ -43,6 +57,17 @@ class RPCHandler:
                 error_message="Параметр 'song-number' обязателен"
             )
 
+        if isinstance(song_number, bool) or not isinstance(song_number, int):
+            raise BadRequestError(
+                error_tag="invalid-value",
+                error_message=f"Неверный номер песни: {song_number}"
+            )
+
+    def _handle_play_rpc(self, input_data):
+        """Обрабатывает RPC операцию 'play'"""
+        playlist_name = input_data.get("playlist")
+        song_number = input_data.get("song-number")
+
         # Проверяем существование плейлиста
         try:
             playlists_data = self.yang_manager.get_data("example-jukebox:jukebox/playlist")
@@ -1,25 +1,40 @@
-from http.server import HTTPServer
+from http.server import ThreadingHTTPServer
 from .restconf import create_restconf_handler
 
 
+class _ThreadingRESTCONFServer(ThreadingHTTPServer):
+    """HTTP сервер с потоком на соединение и увеличенной очередью подключений"""
+    daemon_threads = True
+    request_queue_size = 128
+
+
 class RESTCONFServer:
     """HTTP сервер для обработки RESTCONF запросов"""
 
-    def __init__(self, host, port, yang_manager, rpc_handler):
+    def __init__(self, host, port, yang_manager, rpc_handler, job_manager, admission, replica=None,
+                 body_limits=None):
         self.host = host
         self.port = port
         self.yang_manager = yang_manager
         self.rpc_handler = rpc_handler
+        self.job_manager = job_manager
+        self.admission = admission
+        self.replica = replica
+        self.body_limits = body_limits
         self.httpd = None
 
     def start(self):
         """Запускает HTTP сервер"""
         try:
             # Создаем обработчик с зависимостями
-            handler_class = create_restconf_handler(self.yang_manager, self.rpc_handler)
+            handler_class = create_restconf_handler(
+                self.yang_manager, self.rpc_handler, self.job_manager, self.admission,
+                self.body_limits
+            )
 
-            # Создаем HTTP сервер
-            self.httpd = HTTPServer((self.host, self.port), handler_class)
+            # Создаем HTTP сервер (поток на соединение, чтобы ожидание
+            # заданий не блокировало остальных клиентов)
+            self.httpd = _ThreadingRESTCONFServer((self.host, self.port), handler_class)
 
             print(f"RESTCONF сервер запущен на {self.host}:{self.port}")
             print(f"Доступ к API: http://{self.host}:{self.port}/restconf")
@@ -40,3 +55,6 @@ class RESTCONFServer:
         if self.httpd:
             self.httpd.shutdown()
             print("Сервер остановлен")
+        self.job_manager.shutdown()
+        if self.replica:
+            self.replica.stop()
@@ -3,12 +3,18 @@ from .exceptions import (
     BadRequestError, 
     NotFoundError, 
     ValidationError, 
-    InternalServerError
+    InternalServerError,
+    ServiceUnavailableError,
+    OperationNotSupportedError,
+    GoneError,
+    PayloadTooLargeError
 )
 from .utils import (
     load_config, 
     parse_resource_path, 
+    parse_query_params,
     create_error_response, 
     save_json_file, 
     load_json_file
 )
+from .request_body import RequestBody, parse_json_stream
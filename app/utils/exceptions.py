@@ -26,3 +26,24 @@ class InternalServerError(RESTCONFError):
     """Внутренняя ошибка сервера"""
     def __init__(self, error_message="Internal server error"):
         super().__init__("application", "operation-failed", error_message, 500)
+
+class ServiceUnavailableError(RESTCONFError):
+    """Ошибка 503 - сервер временно не может обработать запрос"""
+    def __init__(self, error_message="Service unavailable", retry_after=1):
+        super().__init__("application", "resource-denied", error_message, 503)
+        self.retry_after = retry_after
+
+class OperationNotSupportedError(RESTCONFError):
+    """Ошибка 405 - операция не поддерживается для ресурса"""
+    def __init__(self, error_message="Operation not supported"):
+        super().__init__("protocol", "operation-not-supported", error_message, 405)
+
+class GoneError(RESTCONFError):
+    """Ошибка 410 - запрошенные данные больше недоступны"""
+    def __init__(self, error_message="Resource is gone"):
+        super().__init__("application", "data-missing", error_message, 410)
+
+class PayloadTooLargeError(RESTCONFError):
+    """Ошибка 413 - тело запроса превышает допустимый размер"""
+    def __init__(self, error_message="Request body too large"):
+        super().__init__("protocol", "too-big", error_message, 413)
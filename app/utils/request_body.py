@@ -0,0 +1,216 @@
+import codecs
+import json
+import re
+from .exceptions import BadRequestError, PayloadTooLargeError
+
+# Максимальная длина строки с размером блока chunked
+MAX_CHUNK_LINE = 1024
+# Элемент массива больше этого размера разбирается по частям, а не целиком
+ELEMENT_LIMIT = 1 << 20
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_NUMBER_CHARS = "0123456789.eE+-"
+_decoder = json.JSONDecoder()
+
+
+class RequestBody:
+    """Тело HTTP запроса (Content-Length или chunked) с ограничением размера
+
+    Размер из Content-Length проверяется до чтения, размер chunked тела -
+    по мере получения блоков.
+    """
+
+    def __init__(self, rfile, headers, max_size=None):
+        self.rfile = rfile
+        self.max_size = max_size
+        self.chunked = "chunked" in headers.get("Transfer-Encoding", "").lower()
+        self.received = 0
+        self.length = None
+        self._chunk_left = 0
+
+        if self.chunked:
+            self.complete = False
+            return
+
+        try:
+            self.length = int(headers.get("Content-Length") or 0)
+        except ValueError:
+            raise BadRequestError(error_message="Неверное значение Content-Length")
+        if self.length < 0:
+            raise BadRequestError(error_message="Неверное значение Content-Length")
+        self._check_size(self.length)
+        self.complete = self.length == 0
+
+    def read(self, size=65536):
+        """Читает до size байт тела (b"" в конце тела)"""
+        if self.complete:
+            return b""
+        if self.chunked:
+            return self._read_chunk(size)
+
+        data = self.rfile.read(min(size, self.length - self.received))
+        if not data:
+            raise BadRequestError(error_message="Тело запроса получено не полностью")
+        self.received += len(data)
+        self.complete = self.received == self.length
+        return data
+
+    def _read_chunk(self, size):
+        """Читает данные текущего блока chunked, при необходимости начиная следующий"""
+        if not self._chunk_left:
+            line = self.rfile.readline(MAX_CHUNK_LINE)
+            try:
+                self._chunk_left = int(line.split(b";")[0].strip(), 16)
+            except ValueError:
+                raise BadRequestError(error_message="Неверный размер блока chunked")
+
+            if not self._chunk_left:
+                # Последний блок: пропускаем трейлеры до пустой строки
+                while line not in (b"\r\n", b"\n", b""):
+                    line = self.rfile.readline(MAX_CHUNK_LINE)
+                self.complete = True
+                return b""
+            self._check_size(self.received + self._chunk_left)
+
+        data = self.rfile.read(min(size, self._chunk_left))
+        if not data:
+            raise BadRequestError(error_message="Тело запроса получено не полностью")
+        self.received += len(data)
+        self._chunk_left -= len(data)
+        if not self._chunk_left:
+            self.rfile.readline(MAX_CHUNK_LINE)
+        return data
+
+    def _check_size(self, size):
+        if self.max_size is not None and size > self.max_size:
+            raise PayloadTooLargeError(
+                error_message=f"Тело запроса больше допустимого размера ({self.max_size} байт)"
+            )
+
+
+class _JSONStream:
+    """Инкрементальный разбор JSON: в памяти только текущий фрагмент текста
+
+    Объекты и массивы обходятся по частям, элементы массивов (записи списков)
+    разбираются целиком C-декодером json, крупные элементы - снова по частям.
+    """
+
+    def __init__(self, body, chunk_size):
+        self.body = body
+        self.chunk_size = chunk_size
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """Дочитывает тело в буфер (удваивая порцию для незавершенного элемента)"""
+        if self.eof:
+            return False
+        self.buf = self.buf[self.pos:]
+        self.pos = 0
+        data = self.body.read(max(self.chunk_size, len(self.buf)))
+        if data:
+            self.buf += self.decoder.decode(data)
+        else:
+            self.buf += self.decoder.decode(b"", final=True)
+            self.eof = True
+        return True
+
+    def peek(self):
+        """Пропускает пробелы и возвращает следующий символ ('' в конце тела)"""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ""
+
+    def value(self):
+        char = self.peek()
+        if char == "{":
+            return self._object()
+        if char == "[":
+            return self._array()
+        return self._scalar()
+
+    def _object(self):
+        self.pos += 1
+        result = {}
+        if self.peek() == "}":
+            self.pos += 1
+            return result
+        while True:
+            if self.peek() != '"':
+                raise BadRequestError(error_message="Неверный формат JSON")
+            key = self._scalar()
+            self._expect(":")
+            result[key] = self.value()
+            if self._next_separator("}"):
+                return result
+
+    def _array(self):
+        self.pos += 1
+        result = []
+        if self.peek() == "]":
+            self.pos += 1
+            return result
+        while True:
+            result.append(self._element())
+            if self._next_separator("]"):
+                return result
+
+    def _element(self):
+        """Разбирает элемент массива целиком, пока он не превышает ELEMENT_LIMIT"""
+        char = self.peek()
+        if char not in "{[":
+            return self._scalar()
+        while True:
+            try:
+                value, self.pos = _decoder.raw_decode(self.buf, self.pos)
+                return value
+            except json.JSONDecodeError:
+                if len(self.buf) - self.pos >= ELEMENT_LIMIT:
+                    return self.value()
+                if not self.fill():
+                    raise BadRequestError(error_message="Неверный формат JSON")
+
+    def _scalar(self):
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+                # Число в конце буфера может продолжаться в следующей порции
+                if self.eof or (end < len(self.buf) and self.buf[end] not in _NUMBER_CHARS):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise BadRequestError(error_message="Неверный формат JSON")
+            self.fill()
+
+    def _expect(self, char):
+        if self.peek() != char:
+            raise BadRequestError(error_message="Неверный формат JSON")
+        self.pos += 1
+
+    def _next_separator(self, closing):
+        """Пропускает ',' или закрывающую скобку, возвращает True для скобки"""
+        char = self.peek()
+        if char not in ("," + closing) or not char:
+            raise BadRequestError(error_message="Неверный формат JSON")
+        self.pos += 1
+        return char == closing
+
+
+def parse_json_stream(body, chunk_size=65536):
+    """Разбирает JSON из тела запроса по частям (None для пустого тела)"""
+    stream = _JSONStream(body, chunk_size)
+    try:
+        if not stream.peek():
+            return None
+        value = stream.value()
+        if stream.peek():
+            raise BadRequestError(error_message="Неверный формат JSON: лишние данные после значения")
+        return value
+    except UnicodeDecodeError:
+        raise BadRequestError(error_message="Тело запроса не в кодировке UTF-8")
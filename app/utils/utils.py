@@ -1,6 +1,16 @@
 import json
+import re
 import yaml
-from urllib.parse import unquote
+from urllib.parse import unquote, parse_qs
+from .exceptions import BadRequestError
+
+# Условие filter: путь листа относительно записи, оператор и значение
+# (в кавычках или без пробелов)
+_FILTER_PREDICATE = re.compile(
+    r"\s*([A-Za-z_][\w.:-]*(?:/[A-Za-z_][\w.:-]*)*)\s*(<=|>=|=|<|>)\s*"
+    r"('[^']*'|\"[^\"]*\"|[^\s'\"]+)\s*"
+)
+_FILTER_AND = re.compile(r"and\s+")
 
 
 def load_config(config_file):
@@ -31,6 +41,64 @@ def parse_resource_path(path):
     return path
 
 
+def parse_query_params(query):
+    """Разбирает параметры запроса depth и content (RFC 8040)"""
+    if isinstance(query, str):
+        query = parse_qs(query, keep_blank_values=True)
+
+    params = {"depth": None, "content": "all", "filter": None}
+    for name, value in (query or {}).items():
+        if isinstance(value, list):
+            if len(value) != 1:
+                raise BadRequestError(error_message=f"Параметр '{name}' указан несколько раз")
+            value = value[0]
+
+        if name == "depth":
+            if value == "unbounded":
+                continue
+            try:
+                depth = int(value)
+            except (TypeError, ValueError):
+                depth = 0
+            if not 1 <= depth <= 65535:
+                raise BadRequestError(error_message=f"Неверное значение параметра depth: {value}")
+            params["depth"] = depth
+        elif name == "content":
+            if value not in ("config", "nonconfig", "all"):
+                raise BadRequestError(error_message=f"Неверное значение параметра content: {value}")
+            params["content"] = value
+        elif name == "filter":
+            params["filter"] = parse_filter(value)
+        else:
+            raise BadRequestError(error_message=f"Неподдерживаемый параметр запроса: {name}")
+
+    return params
+
+
+def parse_filter(text):
+    """Разбирает параметр filter: условия 'путь оп значение', объединенные 'and'
+
+    Возвращает список (сегменты пути, оператор, значение-строка). Операторы:
+    = (равенство) и <, <=, >, >= (диапазон).
+    """
+    predicates, pos = [], 0
+    while True:
+        match = _FILTER_PREDICATE.match(text, pos)
+        if not match:
+            raise BadRequestError(error_message=f"Неверное выражение filter: {text}")
+        path, operator, value = match.groups()
+        if value[0] in "'\"":
+            value = value[1:-1]
+        predicates.append((tuple(path.split("/")), operator, value))
+        pos = match.end()
+        if pos == len(text):
+            return predicates
+        separator = _FILTER_AND.match(text, pos)
+        if not separator:
+            raise BadRequestError(error_message=f"Неверное выражение filter: {text}")
+        pos = separator.end()
+
+
 def create_error_response(error):
     """Создает ответ с ошибкой в формате RESTCONF"""
     return {
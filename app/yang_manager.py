@@ -1,29 +1,251 @@
 import json
 import os
+import sys
+import threading
+import time
+import uuid
+from collections import deque, namedtuple
 from typing import Any, Dict, Optional
+from urllib.parse import unquote
 from yangson import DataModel
 from yangson.enumerations import ContentType
-from .utils.exceptions import ValidationError, InternalServerError
+from yangson.instance import ArrayEntry, ObjectMember, OutputFilter
+from yangson.instvalue import ArrayValue, ObjectValue
+from yangson.schemanode import TerminalNode, ListNode, InternalNode
+from .checkpoint import read_checkpoint, schema_hash, source_stat
+from .compact import RawConverter, compact, compact_instance, memory_report
+from .derived_state import DerivedState
+from .indexes import SecondaryIndexes, compare, leaf_values
+from .utils.exceptions import (
+    RESTCONFError, BadRequestError, NotFoundError, ValidationError, InternalServerError,
+    OperationNotSupportedError, GoneError
+)
 from .utils.utils import load_json_file, save_json_file
 
 
+class QueryFilter(OutputFilter):
+    """Фильтр вывода yangson для параметров запроса depth и content"""
+
+    def __init__(self, depth=None, content="all"):
+        self.depth = depth
+        self.content = content
+        # Уровень текущего узла относительно целевого ресурса (он сам - уровень 1)
+        self.level = 1
+
+    def begin_member(self, parent, node, attributes):
+        self.level += 1
+        if self.depth is not None and self.level > self.depth:
+            return False
+        if self.content == "all":
+            return True
+
+        ctype = node.schema_node.content_type()
+        if self.content == "config":
+            return ctype != ContentType.nonconfig
+        # content=nonconfig: оставляем внутренние узлы и ключи списков
+        if isinstance(node.schema_node, TerminalNode) and ctype == ContentType.config:
+            return node.schema_node.qual_name in getattr(parent.schema_node, "keys", ())
+        return True
+
+    def end_member(self, parent, node, attributes):
+        self.level -= 1
+        return True
+
+
+# Согласованная пара схема + данные и кэши, зависящие от схемы.
+# Заменяется целиком одним присваиванием, поэтому читатели всегда видят
+# данные, связанные именно с той схемой, из которой они взяты.
+SchemaState = namedtuple(
+    "SchemaState", ["data_model", "datastore", "route_cache", "derived", "converter", "indexes"]
+)
+
+ROUTE_CACHE_SIZE = 1024
+
+
 class YANGManager:
     """Управляет YANG моделями и данными через yangson"""
 
-    def __init__(self, library_file: str, modules_dirs: str | list[str], data_file: str):
+    def __init__(self, library_file: str, modules_dirs: str | list[str], data_file: str,
+                 change_log_size: int = 0, checkpoint_file: Optional[str] = None,
+                 change_log_bytes: int = 64 * 1024 * 1024, bulk_change_bytes: int = 1024 * 1024):
         self.library_file = library_file
         self.modules_dirs = modules_dirs if isinstance(modules_dirs, list) else [modules_dirs]
         self.data_file = data_file
-        self.data_model: Optional[DataModel] = None
-        self.datastore: Optional[Any] = None
+        self.checkpoint_file = checkpoint_file
+        self.schema_hash = None
+        self._state = SchemaState(None, None, {}, {}, RawConverter(), {})
+        self.derived = DerivedState()
+        self.indexes = SecondaryIndexes()
+        self._write_lock = threading.RLock()
+        self._reload_lock = threading.Lock()
+        self.schema_generation = 1
+        self.reload_status = {"status": "idle", "generation": self.schema_generation}
+
+        # Журнал изменений для реплик: эпоха меняется при каждом запуске,
+        # порядковый номер - при каждом зафиксированном изменении. Журнал
+        # ведется только при change_log_size > 0 (основной сервер с репликами)
+        # и ограничен числом записей и оценкой их размера в байтах
+        self.read_only = False
+        self.replica = None
+        self.change_epoch = uuid.uuid4().hex
+        self.change_seq = 0
+        self.change_log_size = change_log_size
+        self.change_log_bytes = change_log_bytes
+        self.bulk_change_bytes = bulk_change_bytes
+        self.change_log = deque()
+        self._change_sizes = deque()
+        self._change_log_total = 0
+        self._change_lock = threading.Lock()
+        # Подписчики на новые изменения: ожидающие потоки и сопрограммы потока изменений
+        self._change_listeners = set()
 
         # Инициализируем модель данных и хранилище
         self._init_data_model()
         self._load_datastore()
 
+    @property
+    def data_model(self) -> Optional[DataModel]:
+        return self._state.data_model
+
+    @data_model.setter
+    def data_model(self, data_model):
+        self._state = SchemaState(data_model, self._state.datastore, {}, self._state.derived, RawConverter(),
+                                  self._state.indexes)
+
+    @property
+    def datastore(self) -> Optional[Any]:
+        return self._state.datastore
+
+    @datastore.setter
+    def datastore(self, datastore):
+        # Полная замена данных: дерево хранится в компактном виде, а
+        # производные значения и индексы считаются заново (обход значений
+        # yangson, без построения сырой копии)
+        datastore = compact_instance(datastore)
+        self._state = self._state._replace(
+            datastore=datastore,
+            derived=self.derived.compute(datastore.value) if self.derived.nodes else {},
+            indexes=self.indexes.compute(datastore.value) if self.indexes.indexes else {}
+        )
+
+    def register_derived(self, path, update, initial, lists=()):
+        """Регистрирует config false узел, поддерживаемый функцией update(value, delta)"""
+        node = self._schema_node(path.split("/"))
+        if node is None or node.content_type() != ContentType.nonconfig:
+            raise InternalServerError(f"'{path}' не является config false узлом схемы")
+        for list_path in lists:
+            if not isinstance(self._schema_node(list_path.split("/")), ListNode):
+                raise InternalServerError(f"'{list_path}' не является списком схемы")
+
+        self.derived.register(path, update, initial, lists)
+        with self._write_lock:
+            self.datastore = self.datastore
+
+    def register_counter(self, path, list_path):
+        """Регистрирует счетчик записей списка (например, artist-count)"""
+        self.register_derived(
+            path, lambda value, delta: value + delta.get(list_path, 0), 0, lists=(list_path,)
+        )
+
+    def register_index(self, path):
+        """Регистрирует вторичный индекс неключевого листа записей списка (например, album/genre)"""
+        schema_node, names, lists = self.data_model.schema, [], []
+        for name in path.split("/"):
+            child = self._schema_child(schema_node, name, required=False) \
+                if isinstance(schema_node, InternalNode) else None
+            if child is None:
+                raise InternalServerError(f"'{path}' не является узлом схемы")
+            names.append(child.iname())
+            if isinstance(child, ListNode):
+                lists.append(("/".join(names), [key[0] for key in child.keys]))
+            parent, schema_node = schema_node, child
+
+        if not isinstance(schema_node, TerminalNode) or not lists:
+            raise InternalServerError(f"'{path}' не является листом записи списка")
+        if schema_node.qual_name in getattr(parent, "keys", ()):
+            raise InternalServerError(f"'{path}' - ключ списка, индекс не нужен")
+
+        self.indexes.register("/".join(names), lists)
+        with self._write_lock:
+            self.datastore = self.datastore
+
+    def reload_schema(self):
+        """Запускает перекомпиляцию YANG модулей в фоновом потоке"""
+        if not self._reload_lock.acquire(blocking=False):
+            return dict(self.reload_status)
+
+        self.reload_status = {
+            "status": "in-progress",
+            "generation": self.schema_generation,
+            "started": time.time()
+        }
+        thread = threading.Thread(target=self._reload_schema, name="schema-reload", daemon=True)
+        thread.start()
+        return dict(self.reload_status)
+
+    def _reload_schema(self):
+        """Компилирует новую модель, перепривязывает данные и атомарно меняет пару"""
+        started = self.reload_status["started"]
+        try:
+            digest = schema_hash(self.library_file, self.modules_dirs)
+            data_model = DataModel.from_file(self.library_file, self.modules_dirs)
+
+            # Привязка и валидация идут без блокировки; если за это время
+            # данные изменились, повторяем для свежего снимка
+            for _ in range(3):
+                base = self._state
+                datastore = self._rebind(data_model, base.datastore)
+                with self._write_lock:
+                    if self._state.datastore is base.datastore:
+                        self._swap_schema(data_model, datastore, digest)
+                        break
+            else:
+                with self._write_lock:
+                    self._swap_schema(data_model, self._rebind(data_model, self.datastore), digest)
+
+            self.reload_status = {
+                "status": "completed",
+                "generation": self.schema_generation,
+                "started": started,
+                "finished": time.time()
+            }
+            print(f"YANG модель перезагружена (поколение {self.schema_generation})")
+        except Exception as e:
+            self.reload_status = {
+                "status": "failed",
+                "generation": self.schema_generation,
+                "started": started,
+                "finished": time.time(),
+                "error": str(e)
+            }
+            print(f"Не удалось перезагрузить YANG модель: {e}")
+        finally:
+            self._reload_lock.release()
+
+    def _rebind(self, data_model, datastore):
+        """Привязывает текущие данные к новой схеме и валидирует их"""
+        instance = compact_instance(data_model.from_raw(self._state.converter.instance_to_raw(datastore)))
+        errors = _validation_errors(instance)
+        if errors:
+            # Ошибки, которые были и при текущей схеме, не мешают перезагрузке
+            errors -= _validation_errors(datastore)
+        if errors:
+            raise ValidationError(f"Данные не соответствуют новой схеме: {'; '.join(sorted(errors))}")
+        return instance
+
+    def _swap_schema(self, data_model, datastore, digest):
+        """Заменяет пару схема + данные и сбрасывает кэши схемы (под блокировкой записи)"""
+        self._state = SchemaState(
+            data_model, datastore, {}, self._state.derived, RawConverter(),
+            self.indexes.compute(datastore.value) if self.indexes.indexes else {}
+        )
+        self.schema_hash = digest
+        self.schema_generation += 1
+
     def _init_data_model(self):
         """Инициализирует модель данных yangson"""
         try:
+            self.schema_hash = schema_hash(self.library_file, self.modules_dirs)
             self.data_model = DataModel.from_file(self.library_file, self.modules_dirs)
             print("YANG модель успешно загружена")
         except Exception as e:
@@ -31,6 +253,8 @@ class YANGManager:
 
     def _load_datastore(self):
         """Загружает данные из файла в хранилище"""
+        if self._load_checkpoint():
+            return
         try:
             raw_data = load_json_file(self.data_file)
             if raw_data:
@@ -38,7 +262,9 @@ class YANGManager:
                 # Пропускаем валидацию при загрузке, так как config false поля
                 # могут вызывать проблемы
                 print("Данные загружены без валидации")
-                print(f"Загруженные данные: {raw_data}")
+                # Только имя файла: текст всего дерева при большой библиотеке
+                # занимает десятки МБ, которые процесс уже не возвращает
+                print(f"Загружены данные из {self.data_file}")
             else:
                 # Создаем пустое хранилище
                 self.datastore = self.data_model.from_raw({})  # type: ignore
@@ -55,50 +281,396 @@ class YANGManager:
             except Exception as load_error:
                 raise InternalServerError(f"Не удалось загрузить данные: {e}, {load_error}")
 
-    def get_data(self, resource_path=""):
-        """Получает данные по указанному пути"""
+    def _load_checkpoint(self):
+        """Восстанавливает данные из двоичной контрольной точки, если она актуальна"""
+        if not self.checkpoint_file or not os.path.exists(self.checkpoint_file):
+            return False
         try:
-            if not resource_path:
-                # Возвращаем все данные
-                return self.datastore.raw_value()
+            self.datastore = read_checkpoint(
+                self.checkpoint_file, self.data_model, self.schema_hash, source_stat(self.data_file)
+            )
+            print(f"Данные восстановлены из контрольной точки {self.checkpoint_file}")
+            return True
+        except Exception as e:
+            print(f"Контрольная точка не используется ({e}), загружаем {self.data_file}")
+            return False
+
+    def get_memory_report(self):
+        """Возвращает оценку памяти данных по спискам (байт на запись)"""
+        return memory_report(self._state.datastore)
 
-            # Парсим путь ресурса
+    def get_checkpoint_state(self):
+        """Возвращает согласованные данные, хэш схемы и состояние JSON файла"""
+        # Запись JSON файла при фиксации правки идет под этой же блокировкой
+        with self._write_lock:
+            return self.datastore, self.schema_hash, source_stat(self.data_file)
+
+    def get_data(self, resource_path="", query=None):
+        """Получает данные по указанному пути"""
+        try:
             try:
-                irt = self.data_model.parse_resource_id(resource_path)
-                data_instance = self.datastore.goto(irt)
-                return data_instance.raw_value()
-            except Exception:
+                return self._read(self._state, resource_path, query, {})
+            except NotFoundError:
                 # Если путь не найден, возвращаем None
                 return None
 
+        except RESTCONFError:
+            raise
         except Exception as e:
             raise InternalServerError(f"Ошибка при получении данных: {e}")
 
+    def get_data_batch(self, requests):
+        """Получает данные по нескольким путям из одного снимка хранилища
+
+        requests - список пар (resource_path, query). Возвращает список той же
+        длины, где вместо данных отсутствующего или ошибочного пути стоит
+        исключение RESTCONFError.
+        """
+        # Экземпляры yangson неизменяемы: все пути читаются из одного снимка
+        state = self._state
+        resolved = {}
+        results = []
+        for resource_path, query in requests:
+            try:
+                results.append(self._read(state, resource_path, query, resolved))
+            except RESTCONFError as e:
+                results.append(e)
+            except Exception as e:
+                results.append(InternalServerError(f"Ошибка при получении данных: {e}"))
+        return results
+
+    def _read(self, state, resource_path, query, resolved):
+        """Читает ресурс из снимка state вместе с производными узлами"""
+        irt = self._parse_route(state, resource_path)
+        query = query or {"depth": None, "content": "all"}
+        if query.get("filter"):
+            return self._read_filtered(state, irt, resource_path, query, resolved)
+
+        # Производные узлы не хранятся в дереве и отдаются из state.derived
+        names = tuple(step.iname() for step in irt if hasattr(step, "iname"))
+        if len(names) == len(irt) and query["content"] != "config":
+            value = self.derived.lookup(state.derived, names)
+            if value is not None:
+                return value
+
+        raw_value = self._raw_value(state, self._resolve(state, irt, resource_path, resolved), query)
+        if len(names) == len(irt) and query["content"] != "config":
+            raw_value = self.derived.inject(state.derived, raw_value, names, query["depth"])
+        return raw_value
+
+    def _read_filtered(self, state, irt, resource_path, query, resolved):
+        """Читает записи списка, удовлетворяющие всем условиям параметра filter
+
+        Условия по индексированным листьям дают множества ключей записей
+        из индексов, остальные проверяются просмотром отобранных записей.
+        """
+        instance = self._resolve(state, irt, resource_path, resolved) if irt else None
+        if not isinstance(instance, ObjectMember) or not isinstance(instance.schema_node, ListNode):
+            raise BadRequestError(error_message="Параметр filter применим только к списку")
+        list_node = instance.schema_node
+        list_path = self._instance_path(instance)
+        keys = self._key_path(instance)
+
+        candidates, scan = None, []
+        for segments, operator, text in query["filter"]:
+            names, literal, index_path = self._filter_predicate(list_node, list_path, segments, text)
+            if index_path is None:
+                scan.append((names, operator, literal))
+                continue
+            matched = self.indexes.select(state.indexes, index_path, operator, literal, keys)
+            candidates = matched if candidates is None else candidates & matched
+
+        positions = [
+            i for i, entry in enumerate(instance.value)
+            if (candidates is None or self._entry_key(entry, list_node) in candidates)
+            and all(any(compare(value, operator, literal) for value in leaf_values(entry, names))
+                    for names, operator, literal in scan)
+        ]
+        if query["depth"] is None and query["content"] == "all":
+            return [state.converter.entry_to_raw(instance.value[i], list_node) for i in positions]
+        return [instance[i].raw_value(QueryFilter(query["depth"], query["content"])) for i in positions]
+
+    def _filter_predicate(self, list_node, list_path, segments, text):
+        """Разрешает условие filter по схеме: (имена узлов, значение, путь индекса или None)"""
+        schema_node, names = list_node, []
+        for name in segments:
+            child = self._schema_child(schema_node, name, required=False) \
+                if isinstance(schema_node, InternalNode) else None
+            if child is None:
+                raise BadRequestError(error_message=f"Неизвестный узел '{name}' в параметре filter")
+            names.append(child.iname())
+            schema_node = child
+        if not isinstance(schema_node, TerminalNode):
+            raise BadRequestError(error_message=f"Условие filter '{'/'.join(segments)}' должно ссылаться на лист")
+
+        literal = schema_node.type.parse_value(text)
+        if literal is None:
+            raise BadRequestError(error_message=f"Неверное значение '{text}' для '{'/'.join(segments)}'")
+        index_path = f"{list_path}/{'/'.join(names)}"
+        return tuple(names), literal, index_path if index_path in self.indexes.indexes else None
+
+    def _instance_path(self, instance):
+        """Путь экземпляра из имен узлов без ключей (как у производных узлов и индексов)"""
+        names = []
+        while instance.parinst is not None:
+            if isinstance(instance, ObjectMember):
+                names.append(instance.name)
+            instance = instance.parinst
+        return "/".join(reversed(names))
+
+    def _key_path(self, instance):
+        """Ключи записей списков от корня до экземпляра"""
+        keys = []
+        while instance is not None:
+            if isinstance(instance, ArrayEntry):
+                keys.append(self._entry_key(instance.value, instance.schema_node))
+            instance = instance.parinst
+        return tuple(reversed(keys))
+
+    def _parse_route(self, state, resource_path):
+        """Разбирает путь ресурса с кэшированием для текущей схемы"""
+        if not resource_path:
+            return ()
+
+        irt = state.route_cache.get(resource_path)
+        if irt is None:
+            try:
+                irt = state.data_model.parse_resource_id(resource_path)
+            except Exception as e:
+                raise NotFoundError(error_message=f"Неверный путь '{resource_path}': {e}")
+            if len(state.route_cache) >= ROUTE_CACHE_SIZE:
+                state.route_cache.clear()
+            state.route_cache[resource_path] = irt
+        return irt
+
+    def _resolve(self, state, irt, resource_path, resolved):
+        """Находит экземпляр по пути; общие префиксы путей берутся из resolved"""
+        data_instance = state.datastore
+        prefix = ()
+        for step in irt:
+            prefix += (str(step),)
+            if prefix not in resolved:
+                try:
+                    resolved[prefix] = step.goto_step(data_instance)
+                except Exception:
+                    resolved[prefix] = None
+            data_instance = resolved[prefix]
+            if data_instance is None:
+                raise NotFoundError(
+                    error_tag="invalid-value",
+                    error_message=f"Данные по пути '{resource_path}' не найдены"
+                )
+        return data_instance
+
+    def _raw_value(self, state, data_instance, query):
+        """Возвращает сырое значение экземпляра с учетом параметров запроса
+
+        Без depth и content значение строится из общего дерева: поддеревья
+        без преобразуемых листьев не копируются и не должны изменяться.
+        """
+        if query["depth"] is None and query["content"] == "all":
+            return state.converter.instance_to_raw(data_instance)
+        return data_instance.raw_value(QueryFilter(query["depth"], query["content"]))
+
     def update_data(self, resource_path, data):
         """Обновляет данные по указанному пути (PATCH операция)"""
+        return self._commit("merge", resource_path, data)
+
+    def delete_data(self, resource_path):
+        """Удаляет ресурс по указанному пути (DELETE операция)"""
+        if not resource_path:
+            raise ValidationError("Удаление корня хранилища не поддерживается")
+        return self._commit("delete", resource_path)
+
+    def _commit(self, operation, resource_path, data=None):
+        """Фиксирует правку и добавляет ее в журнал изменений"""
+        if self.read_only:
+            raise OperationNotSupportedError("Сервер работает в режиме реплики только для чтения")
+
+        with self._write_lock:
+            self._update_data(resource_path, data, operation=operation)
+            change = {"seq": self.change_seq + 1, "time": time.time(), "operation": operation,
+                      "path": resource_path}
+            size = _change_size(data, self.bulk_change_bytes) if self.change_log_size else 0
+            if size > self.bulk_change_bytes:
+                # Тело массовой правки не храним: реплика загрузит снимок
+                change["operation"] = "resync"
+                size = _change_size(change, self.bulk_change_bytes)
+            else:
+                change["data"] = data
+            self._record_change(change, size)
+            return True
+
+    def apply_change(self, change):
+        """Применяет изменение из журнала основного сервера (режим реплики)"""
+        with self._write_lock:
+            if change["seq"] != self.change_seq + 1:
+                raise GoneError(
+                    f"Пропуск в журнале изменений: ожидался {self.change_seq + 1}, получен {change['seq']}"
+                )
+            if change.get("operation") == "resync":
+                raise GoneError(f"Массовое изменение {change['seq']} передается только снимком")
+            self._update_data(change["path"], change.get("data"), persist=False,
+                              operation=change.get("operation", "merge"))
+            self._record_change(change)
+
+    def get_snapshot(self):
+        """Возвращает согласованный снимок данных с позицией в журнале изменений"""
+        with self._write_lock:
+            return {
+                "epoch": self.change_epoch,
+                "seq": self.change_seq,
+                "data": self._state.converter.instance_to_raw(self.datastore)
+            }
+
+    def load_snapshot(self, snapshot):
+        """Заменяет данные снимком основного сервера (режим реплики)"""
+        datastore = self.data_model.from_raw(snapshot["data"])
+        with self._write_lock, self._change_lock:
+            self.datastore = datastore
+            self.change_epoch = snapshot["epoch"]
+            self.change_seq = snapshot["seq"]
+            self.change_log.clear()
+            self._change_sizes.clear()
+            self._change_log_total = 0
+            self._notify_changes()
+
+    def get_changes(self, since, epoch=None):
+        """Возвращает изменения после since и позицию конца журнала"""
+        with self._change_lock:
+            if not self.change_log_size:
+                raise OperationNotSupportedError("Журнал изменений не ведется (replication.mode не primary)")
+            if epoch is not None and epoch != self.change_epoch:
+                raise GoneError("Эпоха журнала изменений сменилась, требуется новый снимок")
+            if since > self.change_seq:
+                raise GoneError(f"Позиция {since} впереди журнала изменений ({self.change_seq})")
+            oldest = self.change_log[0]["seq"] if self.change_log else self.change_seq + 1
+            if since + 1 < oldest:
+                raise GoneError(f"Изменения после {since} уже удалены из журнала")
+            return [c for c in self.change_log if c["seq"] > since], self.change_seq
+
+    def get_replication_status(self):
+        """Возвращает состояние репликации"""
+        if self.replica is not None:
+            return self.replica.get_status()
+        with self._change_lock:
+            return {
+                "mode": "primary" if self.change_log_size else "standalone",
+                "epoch": self.change_epoch,
+                "seq": self.change_seq,
+                "oldest-seq": self.change_log[0]["seq"] if self.change_log else self.change_seq + 1,
+                "change-log-entries": len(self.change_log),
+                "change-log-bytes": self._change_log_total
+            }
+
+    def subscribe_changes(self, callback):
+        """Подписывает callback() на новые изменения журнала; возвращает функцию отписки
+
+        callback вызывается под блокировкой журнала и должен только будить
+        ожидающего (например, через loop.call_soon_threadsafe).
+        """
+        with self._change_lock:
+            self._change_listeners.add(callback)
+        return lambda: self._change_listeners.discard(callback)
+
+    def _record_change(self, change, size=0):
+        """Добавляет изменение в журнал и будит подписчиков (под блокировкой записи)"""
+        with self._change_lock:
+            self.change_seq = change["seq"]
+            if self.change_log_size:
+                self.change_log.append(change)
+                self._change_sizes.append(size)
+                self._change_log_total += size
+                # Старые записи вытесняются по числу и по оценке размера
+                while len(self.change_log) > 1 and (len(self.change_log) > self.change_log_size
+                                                   or self._change_log_total > self.change_log_bytes):
+                    self.change_log.popleft()
+                    self._change_log_total -= self._change_sizes.popleft()
+            self._notify_changes()
+
+    def _notify_changes(self):
+        """Будит подписчиков журнала изменений (под блокировкой журнала)"""
+        for callback in list(self._change_listeners):
+            callback()
+
+    def _update_data(self, resource_path, data, persist=True, operation="merge"):
+        """Применяет правку к текущим данным (под блокировкой записи)"""
         try:
-            # Получаем текущие данные
-            current_data = self.datastore.raw_value()
-            
-            # Применяем изменения к сырым данным
-            if resource_path:
-                # Для конкретного пути - обновляем только нужную часть
-                self._update_raw_data(current_data, resource_path, data)
+            state = self._state
+            # Сырая копия строится только для затронутого поддерева
+            anchor, start = self._anchor(state, resource_path, operation)
+            current_data = state.converter.instance_to_raw(anchor, share=False)
+
+            # Применяем изменения к сырым данным, считая добавленные и
+            # удаленные записи списков для производных узлов
+            delta = {}
+            if operation == "delete":
+                self._delete_raw_data(current_data, resource_path, delta, start)
             else:
-                # Для корня - обновляем напрямую
-                current_data.update(data)
+                self._update_raw_data(current_data, resource_path, data, delta, start)
 
-            # Сохраняем данные напрямую в файл, минуя yangson валидацию
-            save_json_file(current_data, self.data_file)
-            
-            # Перезагружаем хранилище из файла
-            self._load_datastore()
+            # Строим новое хранилище: вне поддерева оно разделяет узлы со
+            # старым, которое остается доступным читателям
+            updated = anchor.update(compact(anchor.update(current_data, raw=True).value))
+            datastore = compact_instance(updated.top())
+
+            if persist:
+                # Сохраняем данные напрямую в файл, минуя yangson валидацию
+                save_json_file(state.converter.instance_to_raw(datastore), self.data_file)
+
+            indexes = state.indexes
+            if self.indexes.indexes:
+                # Индексы меняются только для листьев поддерева правки
+                path, keys = start[2], self._key_path(anchor)
+                indexes = self.indexes.apply(indexes, self.indexes.collect(anchor.value, path, keys),
+                                             self.indexes.collect(updated.value, path, keys))
 
+            self._state = self._state._replace(
+                datastore=datastore,
+                derived=self.derived.apply(self._state.derived, delta),
+                indexes=indexes
+            )
             return True
 
+        except RESTCONFError:
+            raise
         except Exception as e:
             raise ValidationError(f"Ошибка обновления данных: {e}")
 
+    def _anchor(self, state, resource_path, operation):
+        """Находит наименьший существующий экземпляр, затрагиваемый правкой
+
+        Возвращает экземпляр и start для _locate_raw: (число пройденных шагов
+        пути, схема, путь списков). Удаление, а также правка листа или списка
+        целиком, затрагивают родителя цели.
+        """
+        irt = self._parse_route(state, resource_path)
+        instance, schema_node, list_path = state.datastore, state.data_model.schema, ""
+        steps = 0
+        for i, step in enumerate(irt):
+            terminal = i == len(irt) - 1
+            if hasattr(step, "iname"):
+                child = self._schema_child(schema_node, step.iname(), required=False)
+                if child is None:
+                    break
+                if terminal and (operation == "delete" or not isinstance(child, InternalNode)
+                                 or isinstance(child, ListNode)):
+                    break
+            elif terminal and operation == "delete":
+                break
+            try:
+                instance = step.goto_step(instance)
+            except Exception:
+                if not hasattr(step, "iname"):
+                    raise NotFoundError(error_message=f"Данные по пути '{resource_path}' не найдены")
+                # Недостающие контейнеры создаются в сырой копии родителя
+                break
+            if hasattr(step, "iname"):
+                name = child.iname()
+                schema_node, list_path = child, f"{list_path}/{name}" if list_path else name
+            steps = i + 1
+        return instance, (steps, schema_node, list_path)
+
     def _create_merge_data(self, resource_path, data):
         """Создает структуру данных для merge операции"""
         if resource_path == "example-jukebox:jukebox/player":
@@ -133,94 +705,228 @@ class YANGManager:
         except Exception as e:
             raise ValidationError(f"Ошибка валидации PATCH данных: {e}")
 
-    def _create_validation_data(self, resource_path, data):
-        """Создает структуру данных для валидации без config false полей"""
-        # Получаем текущие данные
-        if hasattr(self.datastore, 'raw_value'):
-            current_data = self.datastore.raw_value()
-        else:
-            current_data = self.datastore
-        
-        # Создаем копию без config false полей
-        validation_data = self._remove_config_false_fields(current_data)
-        
-        # Применяем изменения
-        if resource_path:
-            # Для конкретного пути - обновляем только нужную часть
-            self._update_validation_data(validation_data, resource_path, data)
-        else:
-            # Для корня - обновляем напрямую
-            validation_data.update(data)
-            
-        return validation_data
+    def _update_raw_data(self, raw_data, resource_path, data, delta, start=None):
+        """Сливает data с ресурсом по указанному пути (merge согласно схеме)"""
+        target, schema_node, list_path, last, _ = self._locate_raw(raw_data, resource_path, create=True,
+                                                                   start=start)
+
+        if last is not None:
+            # Путь к листу или списку целиком - сливаем как член родителя
+            # (тело - значение или {"имя": значение}, имя с префиксом модуля или без)
+            member = self._member_name(data, schema_node)
+            data = {schema_node.iname(): data if member is None else data[member]}
+            schema_node, list_path = last
+        elif isinstance(schema_node, ListNode):
+            # Запись списка в форме RFC 8040: {"module:list": [{...}]}
+            member = self._member_name(data, schema_node)
+            if member is not None and self._schema_child(schema_node, member, required=False) is None:
+                entries = data[member]
+                if not (isinstance(entries, list) and len(entries) == 1):
+                    raise ValidationError("Тело PATCH записи списка должно содержать ровно одну запись")
+                data = entries[0]
+        elif isinstance(data, dict) and len(data) == 1 and schema_node is not self.data_model.schema:
+            # Тело в обертке RFC 8040: {"module:container": {...}}
+            (name, value), = data.items()
+            if name.split(":")[-1] == schema_node.name and isinstance(value, dict) \
+                    and self._schema_child(schema_node, name, required=False) is None:
+                data = value
 
-    def _remove_config_false_fields(self, data):
-        """Удаляет поля config false из структуры данных"""
         if not isinstance(data, dict):
-            return data
-            
-        cleaned_data = {}
-        for key, value in data.items():
-            # Пропускаем известные config false поля
-            if key in ['artist-count', 'album-count', 'song-count']:
-                continue
-            elif isinstance(value, dict):
-                cleaned_data[key] = self._remove_config_false_fields(value)
-            elif isinstance(value, list):
-                cleaned_data[key] = [
-                    self._remove_config_false_fields(item) if isinstance(item, dict) else item
-                    for item in value
-                ]
+            raise ValidationError("Тело PATCH должно быть JSON объектом")
+        if isinstance(schema_node, ListNode):
+            for key_name, _ in schema_node.keys:
+                if key_name in data and str(data[key_name]) != str(target.get(key_name)):
+                    raise ValidationError(f"Нельзя изменить ключ '{key_name}' записи списка")
+        self._merge_raw(target, data, schema_node, list_path, delta)
+
+    @staticmethod
+    def _member_name(data, schema_node):
+        """Имя единственного члена тела, если оно обозначает schema_node (иначе None)"""
+        if isinstance(data, dict) and len(data) == 1:
+            name, = data
+            if name in (schema_node.name, f"{schema_node.ns}:{schema_node.name}"):
+                return name
+        return None
+
+    def _delete_raw_data(self, raw_data, resource_path, delta, start=None):
+        """Удаляет ресурс по указанному пути"""
+        target, schema_node, list_path, last, (parent, member) = self._locate_raw(
+            raw_data, resource_path, create=False, start=start
+        )
+        removed = parent[member]
+        del parent[member]
+
+        if isinstance(schema_node, ListNode) and last is None:
+            # Удалена одна запись списка
+            delta[list_path] = delta.get(list_path, 0) - 1
+            self._count_entries(removed, schema_node, list_path, delta, -1)
+        elif last is not None and isinstance(schema_node, ListNode):
+            delta[list_path] = delta.get(list_path, 0) - len(removed)
+            for entry in removed:
+                self._count_entries(entry, schema_node, list_path, delta, -1)
+        elif isinstance(removed, dict):
+            self._count_entries(removed, schema_node, list_path, delta, -1)
+
+    def _locate_raw(self, raw_data, resource_path, create, start=None):
+        """Находит узел сырых данных по пути вместе с его схемой
+
+        Возвращает (узел, схема, путь списков, last, (родитель, ключ в нем)).
+        Если путь заканчивается листом или списком без ключей, узел -
+        родительский объект, а last - пара (схема, путь) родителя.
+        raw_data - корень или поддерево, start - результат _anchor для него.
+        """
+        steps, schema_node, list_path = start or (0, self.data_model.schema, "")
+        node = raw_data
+        located = (None, None)
+        irt = self._parse_route(self._state, resource_path)
+        last = None
+
+        for i, step in enumerate(irt[steps:], steps):
+            if hasattr(step, "iname"):
+                child = self._schema_child(schema_node, step.iname())
+                name = child.iname()
+                child_path = f"{list_path}/{name}" if list_path else name
+                terminal = i == len(irt) - 1
+                if terminal and (not isinstance(child, InternalNode) or isinstance(child, ListNode)):
+                    if name not in node and not create:
+                        raise NotFoundError(error_message=f"Данные по пути '{resource_path}' не найдены")
+                    last = (schema_node, list_path)
+                    return node, child, child_path, last, (node, name)
+
+                if name not in node:
+                    if not create or isinstance(child, ListNode):
+                        raise NotFoundError(error_message=f"Данные по пути '{resource_path}' не найдены")
+                    node[name] = {}
+                located = (node, name)
+                node, schema_node, list_path = node[name], child, child_path
             else:
-                cleaned_data[key] = value
-                
-        return cleaned_data
+                entry = next((e for e in node if all(
+                    str(e.get(key[0])) == value for key, value in step.keys.items()
+                )), None)
+                if entry is None:
+                    raise NotFoundError(error_message=f"Данные по пути '{resource_path}' не найдены")
+                located = (node, node.index(entry))
+                node = entry
 
-    def _update_raw_data(self, raw_data, resource_path, data):
-        """Обновляет сырые данные по указанному пути"""
-        if resource_path == "example-jukebox:jukebox/player":
-            if "example-jukebox:jukebox" not in raw_data:
-                raw_data["example-jukebox:jukebox"] = {}
-            if "player" not in raw_data["example-jukebox:jukebox"]:
-                raw_data["example-jukebox:jukebox"]["player"] = {}
-            raw_data["example-jukebox:jukebox"]["player"].update(data)
-        else:
-            # Для других путей применяем общее обновление
-            raw_data.update(data)
+        return node, schema_node, list_path, last, located
 
-    def _update_validation_data(self, validation_data, resource_path, data):
-        """Обновляет данные в структуре валидации по указанному пути"""
-        # Упрощенная реализация - в реальности нужна более сложная логика
-        # для правильного обновления вложенных структур
-        if resource_path == "example-jukebox:jukebox/player":
-            if "example-jukebox:jukebox" not in validation_data:
-                validation_data["example-jukebox:jukebox"] = {}
-            validation_data["example-jukebox:jukebox"]["player"] = data
-        else:
-            # Для других путей применяем общее обновление
-            validation_data.update(data)
+    def _merge_raw(self, target, data, schema_node, list_path, delta):
+        """Рекурсивно сливает объект data с target, учитывая новые записи списков в delta"""
+        for name, value in data.items():
+            child = self._schema_child(schema_node, name)
+            if child.content_type() == ContentType.nonconfig:
+                raise ValidationError(f"Узел '{name}' (config false) нельзя изменять")
+            name = child.iname()
+            child_path = f"{list_path}/{name}" if list_path else name
 
-    def _merge_data(self, datastore, path, data):
-        """Вспомогательный метод для слияния данных"""
-        # Упрощенная логика слияния
-        raw_data = datastore.raw_value()
+            if isinstance(child, ListNode):
+                if not isinstance(value, list):
+                    raise ValidationError(f"Значение списка '{name}' должно быть массивом")
+                entries = target.setdefault(name, [])
+                # Индекс записей по ключам: массовый импорт сливается за линейное время
+                index = {self._entry_key(e, child): e for e in entries} if value else {}
+                seen = set()
+                for entry in value:
+                    key = self._checked_key(entry, child, seen)
+                    existing = index.get(key)
+                    if existing is not None:
+                        self._merge_raw(existing, entry, child, child_path, delta)
+                    else:
+                        self._check_config(entry, child)
+                        entries.append(entry)
+                        index[key] = entry
+                        delta[child_path] = delta.get(child_path, 0) + 1
+                        self._count_entries(entry, child, child_path, delta, 1)
+            elif isinstance(child, InternalNode) and isinstance(value, dict):
+                self._merge_raw(target.setdefault(name, {}), value, child, child_path, delta)
+            else:
+                target[name] = value
 
-        # Это базовая реализация, в реальности нужна более сложная логика
-        # для правильного слияния данных по пути
-        if isinstance(data, dict):
-            for key, value in data.items():
-                raw_data[key] = value
+    def _entry_key(self, entry, list_node):
+        """Возвращает значения ключей записи списка"""
+        return tuple(entry.get(key[0]) for key in list_node.keys)
 
-        return self.data_model.from_raw(raw_data)
+    def _checked_key(self, entry, list_node, seen):
+        """Возвращает ключи записи из тела правки, проверяя их наличие и уникальность в seen"""
+        name = list_node.iname()
+        if not isinstance(entry, dict):
+            raise ValidationError(f"Запись списка '{name}' должна быть JSON объектом")
+        key = self._entry_key(entry, list_node)
+        missing = [key_name for (key_name, _), value in zip(list_node.keys, key) if value is None]
+        if missing:
+            raise ValidationError(f"У записи списка '{name}' нет ключа '{missing[0]}'")
+        if key in seen:
+            raise ValidationError(f"Повторяющийся ключ {list(key)} в списке '{name}'")
+        seen.add(key)
+        return key
 
-    def _save_datastore(self):
-        """Сохраняет хранилище в файл"""
-        try:
-            # Получаем сырые данные из хранилища
-            raw_data = self.datastore.raw_value()
-            save_json_file(raw_data, self.data_file)
-        except Exception as e:
-            raise InternalServerError(f"Не удалось сохранить данные: {e}")
+    def _count_entries(self, raw_value, schema_node, list_path, delta, sign):
+        """Учитывает в delta записи вложенных списков добавленного или удаленного поддерева"""
+        for name, value in raw_value.items():
+            child = self._schema_child(schema_node, name, required=False)
+            if child is None:
+                continue
+            child_path = f"{list_path}/{child.iname()}"
+            if isinstance(child, ListNode) and isinstance(value, list):
+                delta[child_path] = delta.get(child_path, 0) + sign * len(value)
+                for entry in value:
+                    self._count_entries(entry, child, child_path, delta, sign)
+            elif isinstance(child, InternalNode) and isinstance(value, dict):
+                self._count_entries(value, child, child_path, delta, sign)
+
+    def _check_config(self, raw_value, schema_node):
+        """Проверяет новое поддерево: нет config false узлов, записи списков с уникальными ключами"""
+        for name, value in raw_value.items():
+            child = self._schema_child(schema_node, name)
+            if child.content_type() == ContentType.nonconfig:
+                raise ValidationError(f"Узел '{name}' (config false) нельзя изменять")
+            if isinstance(child, ListNode) and isinstance(value, list):
+                seen = set()
+                for entry in value:
+                    self._checked_key(entry, child, seen)
+                    self._check_config(entry, child)
+            elif isinstance(child, InternalNode) and isinstance(value, dict):
+                self._check_config(value, child)
+
+    def _schema_child(self, schema_node, name, required=True):
+        """Находит дочерний узел схемы по имени члена JSON ('module:name' или 'name')"""
+        module, _, local = name.rpartition(":")
+        child = schema_node.get_data_child(local, module or schema_node.ns)
+        if child is None and required:
+            raise ValidationError(f"Неизвестный узел '{name}'")
+        return child
+
+    def _schema_node(self, segments):
+        """Находит узел схемы по пути из имен узлов"""
+        schema_node = self.data_model.schema
+        for name in segments:
+            schema_node = self._schema_child(schema_node, name, required=False) \
+                if isinstance(schema_node, InternalNode) else None
+            if schema_node is None:
+                return None
+        return schema_node
+
+    def list_distance(self, path):
+        """Число уровней от ресурса до ближайшего списка в его поддереве схемы
+
+        path - путь ресурса в форме URI. 0 - путь ведет к списку целиком,
+        1 - список среди дочерних узлов ресурса и т.д.; None - списков нет
+        или путь не найден в схеме.
+        """
+        segments = [s for s in path.split("/") if s]
+        schema_node = self._schema_node([unquote(s.split("=", 1)[0]) for s in segments])
+        if schema_node is None:
+            return None
+        level, nodes = 0, [schema_node]
+        if isinstance(schema_node, ListNode) and "=" in segments[-1]:
+            # Запись списка: ищем списки среди ее дочерних узлов
+            level, nodes = 1, schema_node.data_children()
+        while nodes:
+            if any(isinstance(node, ListNode) for node in nodes):
+                return level
+            nodes = [child for node in nodes if isinstance(node, InternalNode) for child in node.data_children()]
+            level += 1
+        return None
 
     def validate_data(self, data):
         """Валидирует данные против схемы"""
@@ -230,3 +936,36 @@ class YANGManager:
             return True
         except Exception as e:
             raise ValidationError(f"Данные не прошли валидацию: {e}")
+
+
+def _validation_errors(node):
+    """Полный набор ошибок валидации узла: при ошибке проверяются его дочерние узлы"""
+    try:
+        node.validate(ctype=ContentType.config)
+        return set()
+    except Exception as e:
+        error = str(e)
+
+    if isinstance(node.value, ObjectValue):
+        children = [node[name] for name in node.value]
+    elif isinstance(node.value, ArrayValue):
+        children = [node[i] for i in range(len(node.value))]
+    else:
+        return {error}
+    # Ошибка самого узла (без ошибок в дочерних) тоже попадает в набор
+    errors = set().union(*(_validation_errors(child) for child in children))
+    return errors or {error}
+
+
+def _change_size(value, limit):
+    """Оценивает размер тела правки в байтах; обход прекращается после превышения limit"""
+    size, stack = 0, [value]
+    while stack and size <= limit:
+        item = stack.pop()
+        size += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, list):
+            stack.extend(item)
+    return size
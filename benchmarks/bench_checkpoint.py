@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Бенчмарк восстановления данных: JSON файл против двоичной контрольной точки.
+
+Строит синтетическую библиотеку, сохраняет ее в JSON и в контрольную точку и
+сравнивает время восстановления дерева экземпляров yangson:
+- текущий путь: json.load + DataModel.from_raw;
+- контрольная точка: read_checkpoint (mmap + таблица констант).
+
+Запуск: python3 benchmarks/bench_checkpoint.py [--artists 1000] [--repeat 3]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from yangson import DataModel  # noqa: E402
+from app.checkpoint import read_checkpoint, schema_hash, source_stat, write_checkpoint  # noqa: E402
+from common import best_of, make_library  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--artists", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    library_file = os.path.join(ROOT, "library.json")
+    modules_dirs = [os.path.join(ROOT, "yang_modules")]
+    data_model = DataModel.from_file(library_file, modules_dirs)
+    digest = schema_hash(library_file, modules_dirs)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        data_file = os.path.join(workdir, "data.json")
+        checkpoint_file = os.path.join(workdir, "data.ckpt")
+        with open(data_file, "w", encoding="utf-8") as f:
+            json.dump(make_library(args.artists), f, indent=2, ensure_ascii=False)
+        source = source_stat(data_file)
+
+        def restore_json():
+            with open(data_file, encoding="utf-8") as f:
+                return data_model.from_raw(json.load(f))
+
+        json_time, instance = best_of(args.repeat, restore_json)
+        write_time, size = best_of(1, lambda: write_checkpoint(checkpoint_file, instance, digest, source))
+        ckpt_time, restored = best_of(
+            args.repeat, lambda: read_checkpoint(checkpoint_file, data_model, digest, source)
+        )
+        assert restored.value == instance.value, "Контрольная точка восстановила другие данные"
+
+        print(f"Песен: {args.artists * 100}")
+        print(f"JSON:              {os.path.getsize(data_file) / 1e6:6.1f} МБ, "
+              f"json.load + from_raw {json_time:.2f} с")
+        print(f"Контрольная точка: {size / 1e6:6.1f} МБ, "
+              f"восстановление {ckpt_time:.2f} с (запись {write_time:.2f} с)")
+        print(f"Ускорение восстановления: {json_time / ckpt_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""Бенчмарк движков HTTP сервера: threaded против asyncio.
+
+Для каждого движка запускает сервер в отдельном процессе и измеряет:
+- сколько простаивающих соединений сервер удерживает, продолжая отвечать
+  на запросы (число потоков и RSS процесса, задержка пробного запроса);
+- пропускную способность дешевых чтений (req/s) замкнутым циклом клиентов.
+
+Запуск: python3 benchmarks/bench_engines.py [--idle 2000] [--duration 5]
+"""
+import argparse
+import http.client
+import multiprocessing
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_overload import start_server, percentile  # noqa: E402
+
+READ_PATH = "/restconf/data/example-jukebox:jukebox/player"
+CLIENTS = 32
+PROCESSES = max(2, min(8, (os.cpu_count() or 2) - 1))
+
+# Бюджеты допуска не должны ограничивать измерение движка
+NO_ADMISSION = {
+    "budgets": {"read": 10000, "full_read": 10000, "write": 10000},
+    "per_client": 10000, "max_queue": 10000, "queue_timeout": 3600,
+}
+
+
+def process_stats(pid):
+    """Возвращает число потоков и RSS (МБ) процесса"""
+    stats = {}
+    with open(f"/proc/{pid}/status", encoding="utf-8") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            stats[name] = value.strip()
+    return int(stats["Threads"]), int(stats["VmRSS"].split()[0]) / 1024
+
+
+def probe(port):
+    """Выполняет пробный запрос и возвращает задержку (None при ошибке)"""
+    start = time.monotonic()
+    try:
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+        conn.request("GET", READ_PATH)
+        response = conn.getresponse()
+        response.read()
+        conn.close()
+        return time.monotonic() - start if response.status == 200 else None
+    except OSError:
+        return None
+
+
+def hold_connections(port, count):
+    """Открывает count соединений с незавершенным запросом (медленные клиенты)"""
+    sockets = []
+    for i in range(count):
+        try:
+            s = socket.create_connection(("127.0.0.1", port), timeout=5)
+            s.sendall(b"GET " + READ_PATH.encode() + b" HTTP/1.1\r\nHost: bench\r\n")
+            sockets.append(s)
+        except OSError:
+            break
+    return sockets
+
+
+def measure_idle(proc, port, idle):
+    """Измеряет удержание простаивающих соединений"""
+    threads_before, rss_before = process_stats(proc.pid)
+    sockets = hold_connections(port, idle)
+    time.sleep(1)
+    threads, rss = process_stats(proc.pid)
+    latencies = [probe(port) for _ in range(20)]
+    for s in sockets:
+        s.close()
+    served = [lat for lat in latencies if lat is not None]
+    return {
+        "opened": len(sockets),
+        "threads": (threads_before, threads),
+        "rss": (rss_before, rss),
+        "probes": len(served),
+        "probe_p50": percentile(served, 50),
+    }
+
+
+def closed_loop(port, duration, clients, keepalive):
+    """Замкнутый цикл чтений; keepalive - одно соединение на клиента"""
+    done = [0]
+    latencies = []
+    lock = threading.Lock()
+    stop = time.monotonic() + duration
+
+    def worker():
+        conn = None
+        while time.monotonic() < stop:
+            start = time.monotonic()
+            try:
+                if conn is None:
+                    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+                conn.request("GET", READ_PATH)
+                response = conn.getresponse()
+                response.read()
+                if response.will_close or not keepalive:
+                    conn.close()
+                    conn = None
+            except OSError:
+                conn = None
+                continue
+            with lock:
+                done[0] += response.status == 200
+                latencies.append(time.monotonic() - start)
+
+    threads = [threading.Thread(target=worker) for _ in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return done[0], latencies
+
+
+def measure_throughput(port, duration, keepalive):
+    """Измеряет req/s клиентами в нескольких процессах"""
+    per_process = [CLIENTS // PROCESSES + (i < CLIENTS % PROCESSES) for i in range(PROCESSES)]
+    with multiprocessing.Pool(PROCESSES) as pool:
+        results = pool.starmap(closed_loop, [(port, duration, n, keepalive) for n in per_process])
+    latencies = [lat for _, lats in results for lat in lats]
+    return sum(done for done, _ in results) / duration, percentile(latencies, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--idle", type=int, default=2000)
+    parser.add_argument("--duration", type=float, default=5)
+    parser.add_argument("--artists", type=int, default=5)
+    args = parser.parse_args()
+
+    engines = [
+        ("threaded", {"engine": "threaded"}),
+        ("asyncio", {"engine": "asyncio", "workers": 32}),
+    ]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, options in engines:
+            proc, port = start_server(workdir, NO_ADMISSION, args.artists, options)
+            try:
+                # Пропускная способность - до удержания соединений: тысячи
+                # потоков threaded движка после него еще долго завершаются
+                rps, p99 = measure_throughput(port, args.duration, keepalive=False)
+                rps_ka, p99_ka = measure_throughput(port, args.duration, keepalive=True)
+                idle = measure_idle(proc, port, args.idle)
+            finally:
+                proc.kill()
+                proc.wait()
+
+            print(f"\n--- {name} ---")
+            print(f"Простаивающих соединений: {idle['opened']}, потоков: "
+                  f"{idle['threads'][0]} -> {idle['threads'][1]}, RSS: "
+                  f"{idle['rss'][0]:.0f} -> {idle['rss'][1]:.0f} МБ")
+            print(f"Пробные запросы при удержании: {idle['probes']}/20, "
+                  f"p50={idle['probe_p50'] * 1000:.1f} мс")
+            print(f"Чтения, новое соединение на запрос: {rps:.0f} req/s, p99={p99 * 1000:.1f} мс")
+            print(f"Чтения, keep-alive: {rps_ka:.0f} req/s, p99={p99_ka * 1000:.1f} мс")
+
+
+if __name__ == "__main__":
+    main()
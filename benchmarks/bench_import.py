@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""Бенчмарк пиковой памяти (RSS) при массовом импорте через PATCH.
+
+1. Разбор тела в отдельных процессах: прежний способ (read + decode +
+   json.loads) против потокового разбора RequestBody + parse_json_stream.
+2. Импорт библиотеки PATCH-запросом (Content-Length и chunked) в запущенный
+   сервер: пиковый RSS процесса сервера до и после импорта.
+
+Запуск: python3 benchmarks/bench_import.py [--artists 2000]
+"""
+import argparse
+import http.client
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import make_artists  # noqa: E402
+
+LIBRARY_PATH = "/restconf/data/example-jukebox:jukebox/library"
+
+
+def make_body(path, artists, albums=10, songs=10):
+    """Пишет тело PATCH с библиотекой artists x albums x songs"""
+    body = {"artist": make_artists(artists, albums, songs, prefix="Import Artist")}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(body, f, indent=2)
+    return os.path.getsize(path)
+
+
+def max_rss_mb():
+    """Пиковый RSS текущего процесса в МБ"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def parse_phase(method, path):
+    """Разбирает тело из файла указанным способом и печатает прирост пикового RSS"""
+    from app.utils import RequestBody, parse_json_stream
+
+    size = os.path.getsize(path)
+    baseline = max_rss_mb()
+    start = time.perf_counter()
+    with open(path, "rb") as rfile:
+        if method == "loads":
+            data = json.loads(rfile.read(size).decode("utf-8"))
+        else:
+            data = parse_json_stream(RequestBody(rfile, {"Content-Length": str(size)}))
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"entries": len(data["artist"]), "peak": max_rss_mb() - baseline,
+                      "seconds": elapsed}))
+
+
+def run_parse_phase(method, path):
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), "--phase", method, path],
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output)
+
+
+def chunked(path, chunk_size=65536):
+    """Отдает файл блоками для Transfer-Encoding: chunked"""
+    with open(path, "rb") as f:
+        while True:
+            data = f.read(chunk_size)
+            if not data:
+                return
+            yield data
+
+
+def server_memory(pid):
+    """Текущий и пиковый RSS процесса сервера в МБ"""
+    stats = {}
+    with open(f"/proc/{pid}/status", encoding="utf-8") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            stats[name] = value.strip()
+    return int(stats["VmRSS"].split()[0]) / 1024, int(stats["VmHWM"].split()[0]) / 1024
+
+
+def import_phase(workdir, path, use_chunked):
+    """Импортирует тело PATCH-запросом и возвращает RSS сервера до и после"""
+    from bench_overload import start_server
+
+    admission = {"budgets": {"read": 100, "full_read": 100, "write": 100}}
+    proc, port = start_server(workdir, admission, 1, {"max_body_size": 1 << 34})
+    try:
+        rss_before, _ = server_memory(proc.pid)
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=600)
+        headers = {"Content-Type": "application/yang-data+json"}
+        start = time.perf_counter()
+        if use_chunked:
+            conn.request("PATCH", LIBRARY_PATH, body=chunked(path), headers=headers,
+                         encode_chunked=True)
+        else:
+            with open(path, "rb") as f:
+                headers["Content-Length"] = str(os.path.getsize(path))
+                conn.request("PATCH", LIBRARY_PATH, body=f, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        elapsed = time.perf_counter() - start
+        rss_after, peak = server_memory(proc.pid)
+        return response.status, rss_before, rss_after, peak, elapsed
+    finally:
+        proc.kill()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--artists", type=int, default=2000)
+    parser.add_argument("--phase", nargs=2, metavar=("METHOD", "FILE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.phase:
+        parse_phase(*args.phase)
+        return
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "import.json")
+        size = make_body(path, args.artists)
+        print(f"Тело импорта: {size / 1024 / 1024:.1f} МБ, записей song: {args.artists * 100}")
+
+        print("\n--- Разбор тела ---")
+        for name, method in [("read + json.loads", "loads"), ("потоковый разбор", "stream")]:
+            result = run_parse_phase(method, path)
+            print(f"{name}: прирост пикового RSS {result['peak']:.0f} МБ, {result['seconds']:.2f} с")
+
+        print("\n--- Импорт в сервер ---")
+        for name, use_chunked in [("Content-Length", False), ("chunked", True)]:
+            status, before, after, peak, elapsed = import_phase(workdir, path, use_chunked)
+            print(f"{name}: статус {status}, {elapsed:.1f} с, RSS {before:.0f} -> {after:.0f} МБ, "
+                  f"пик {peak:.0f} МБ")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Бенчмарк параметра filter: вторичные индексы против полного просмотра.
+
+Строит синтетическую библиотеку с разными жанрами, годами и форматами песен
+и загружает ее в два YANGManager: с индексами album/genre, album/year и
+album/song/format и без них (filter проверяет каждую запись). Печатает время
+запросов с условиями равенства и диапазона, а также время правки, в которой
+поддерживаются индексы.
+
+Запуск: python3 benchmarks/bench_index.py [--artists 1000] [--repeat 5]
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import YANGManager  # noqa: E402
+from app.utils.utils import parse_query_params  # noqa: E402
+from common import best_of, make_library  # noqa: E402
+
+LIBRARY = "example-jukebox:jukebox/library"
+INDEXES = [f"{LIBRARY}/artist/album/genre", f"{LIBRARY}/artist/album/year",
+           f"{LIBRARY}/artist/album/song/format"]
+GENRES = ["jbox:alternative", "jbox:blues", "jbox:country", "jbox:jazz", "jbox:pop", "jbox:rock"]
+
+QUERIES = [
+    ("artist", "album/genre='jbox:blues' and album/year=2020"),
+    ("artist", "album/song/format=FLAC"),
+    ("artist", "album/year<1952"),
+    ("artist=Artist%207/album", "genre='jbox:jazz'"),
+]
+
+
+def make_varied_library(artists, seed=1):
+    """Библиотека make_library с разными жанрами, годами и форматами (FLAC - 0.1% песен)"""
+    data = make_library(artists)
+    rng = random.Random(seed)
+    for artist in data["example-jukebox:jukebox"]["library"]["artist"]:
+        for album in artist["album"]:
+            album["genre"] = rng.choice(GENRES)
+            album["year"] = rng.randint(1950, 2024)
+            for song in album["song"]:
+                song["format"] = "FLAC" if rng.random() < 0.001 else rng.choice(["MP3", "OGG"])
+    return data
+
+
+def load_manager(data_file, indexes):
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        manager = YANGManager(os.path.join(ROOT, "library.json"), [os.path.join(ROOT, "yang_modules")],
+                              data_file)
+        for path in indexes:
+            manager.register_index(path)
+    return manager
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--artists", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        data_file = os.path.join(workdir, "data.json")
+        with open(data_file, "w", encoding="utf-8") as f:
+            json.dump(make_varied_library(args.artists), f, ensure_ascii=False)
+        print(f"Песен: {args.artists * 100}")
+
+        start = time.perf_counter()
+        indexed = load_manager(data_file, INDEXES)
+        print(f"Загрузка с построением индексов: {time.perf_counter() - start:.2f} с")
+        scanning = load_manager(data_file, [])
+
+        print(f"\n{'запрос':<62} {'записей':>7} {'индекс':>9} {'просмотр':>9}")
+        for target, expression in QUERIES:
+            path = f"{LIBRARY}/{target}"
+            query = parse_query_params(f"filter={expression}")
+            index_time, result = best_of(args.repeat, lambda: indexed.get_data(path, query))
+            scan_time, expected = best_of(args.repeat, lambda: scanning.get_data(path, query))
+            assert result == expected, f"Индекс и просмотр дали разные записи: {expression}"
+            print(f"{target + '?filter=' + expression:<62} {len(result):>7} "
+                  f"{index_time * 1000:>7.2f}мс {scan_time * 1000:>7.2f}мс  "
+                  f"({scan_time / index_time:.0f}x)")
+
+        # Правка поддерживает индексы по листьям только своего поддерева
+        print()
+        for name, manager in [("с индексами", indexed), ("без индексов", scanning)]:
+            formats = iter(["FLAC", "MP3"] * args.repeat)
+
+            def patch():
+                with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                    manager._update_data(f"{LIBRARY}/artist=Artist%203/album=Album%204/song=Song%205",
+                                         {"format": next(formats)}, persist=False)
+
+            commit_time, _ = best_of(args.repeat, patch)
+            print(f"Правка format одной песни {name}: {commit_time * 1000:.2f} мс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Бенчмарк памяти хранилища: дерево yangson против компактного представления.
+
+Каждый вариант загружается в отдельном процессе из одного JSON файла:
+- yangson: json.load + DataModel.from_raw, чтение через raw_value;
+- компактный: YANGManager (интернирование, узлы без словаря атрибутов),
+  чтение через RawConverter без копирования готовых поддеревьев.
+Печатает прирост RSS после загрузки, оценку байт на запись списков и время
+чтения всего дерева.
+
+Запуск: python3 benchmarks/bench_memory.py [--artists 1000]
+"""
+import argparse
+import contextlib
+import gc
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+LIBRARY_FILE = os.path.join(ROOT, "library.json")
+MODULES_DIRS = [os.path.join(ROOT, "yang_modules")]
+
+
+def rss_mb():
+    """Текущий RSS процесса в МБ"""
+    with open("/proc/self/status", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0
+
+
+def load_phase(variant, data_file):
+    """Загружает данные указанным способом и печатает результаты в JSON"""
+    from yangson import DataModel
+    from app import YANGManager
+    from app.compact import memory_report
+
+    data_model = DataModel.from_file(LIBRARY_FILE, MODULES_DIRS)
+    gc.collect()
+    baseline = rss_mb()
+    start = time.perf_counter()
+    if variant == "yangson":
+        with open(data_file, encoding="utf-8") as f:
+            datastore = data_model.from_raw(json.load(f))
+        read = datastore.raw_value
+    else:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            manager = YANGManager(LIBRARY_FILE, MODULES_DIRS, data_file)
+        datastore = manager.datastore
+        read = lambda: manager.get_data("")  # noqa: E731
+    load_time = time.perf_counter() - start
+    gc.collect()
+    loaded = rss_mb() - baseline
+
+    start = time.perf_counter()
+    read()
+    read_time = time.perf_counter() - start
+
+    report = memory_report(datastore)
+    print(json.dumps({"rss": loaded, "load": load_time, "read": read_time, "report": report}))
+
+
+def run_phase(variant, data_file):
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), "--phase", variant, data_file],
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--artists", type=int, default=1000)
+    parser.add_argument("--phase", nargs=2, metavar=("VARIANT", "FILE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.phase:
+        load_phase(*args.phase)
+        return
+
+    from common import make_library
+
+    with tempfile.TemporaryDirectory() as workdir:
+        data_file = os.path.join(workdir, "data.json")
+        with open(data_file, "w", encoding="utf-8") as f:
+            json.dump(make_library(args.artists), f, indent=2, ensure_ascii=False)
+        print(f"Песен: {args.artists * 100}, JSON: {os.path.getsize(data_file) / 1e6:.1f} МБ")
+
+        results = {}
+        for name, variant in [("yangson", "yangson"), ("компактный", "compact")]:
+            result = results[variant] = run_phase(variant, data_file)
+            report = result["report"]
+            print(f"\n--- {name} ---")
+            print(f"Загрузка {result['load']:.2f} с, прирост RSS {result['rss']:.0f} МБ, "
+                  f"оценка данных {report['total-bytes'] / 1e6:.1f} МБ")
+            print(f"Чтение всего дерева: {result['read'] * 1000:.0f} мс")
+            for path, stats in report["lists"].items():
+                print(f"  {path}: {stats['entries']} записей, {stats['bytes-per-entry']} байт/запись")
+
+        print(f"\nСокращение RSS: {results['yangson']['rss'] / results['compact']['rss']:.1f}x, "
+              f"ускорение чтения: {results['yangson']['read'] / results['compact']['read']:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""Бенчмарк контроля допуска: p99 задержки при двукратной перегрузке.
+
+Запускает сервер в отдельном процессе (с копией данных во временном каталоге),
+измеряет пропускную способность замкнутым циклом, затем подает открытую
+нагрузку с интенсивностью 2x от измеренной - с контролем допуска и без него.
+
+Запуск: python3 benchmarks/bench_overload.py [--duration 10]
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import queue
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import ROOT, make_library  # noqa: E402
+
+JUKEBOX = "/restconf/data/example-jukebox:jukebox"
+
+# Смесь запросов по классам допуска: дешевые чтения (ресурсы без списков),
+# чтения списков и всего дерева (full_read) и запись
+REQUEST_MIX = [
+    (0.45, "GET", f"{JUKEBOX}/player", None),
+    (0.25, "GET", f"{JUKEBOX}/library/artist=Artist%201/album=Album%200/song=Song%202", None),
+    (0.1, "GET", f"{JUKEBOX}/library/artist", None),
+    (0.1, "GET", "/restconf/data", None),
+    (0.1, "PATCH", f"{JUKEBOX}/player", {"gap": "0.5"}),
+]
+
+CLIENTS = 32
+PROCESSES = max(2, min(8, (os.cpu_count() or 2) - 1))
+
+
+def free_port():
+    """Возвращает свободный TCP порт"""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(workdir, admission, artists, server_options=None):
+    """Запускает сервер с указанными настройками допуска (и движка в server_options)"""
+    port = free_port()
+    data_file = os.path.join(workdir, f"data-{port}.json")
+    with open(data_file, "w", encoding="utf-8") as f:
+        # Небольшие альбомы: чтение всего дерева дорогое за счет числа исполнителей
+        json.dump(make_library(artists, albums=2, songs=5), f)
+    config = {
+        "server": {"host": "127.0.0.1", "port": port, **(server_options or {})},
+        "datastore": {"data_file": data_file},
+        "yang": {"modules_dir": os.path.join(ROOT, "yang_modules"),
+                 "library_file": os.path.join(ROOT, "library.json")},
+        "admission": admission,
+    }
+    config_file = os.path.join(workdir, f"config-{port}.yaml")
+    with open(config_file, "w", encoding="utf-8") as f:
+        yaml.safe_dump(config, f)
+
+    proc = subprocess.Popen([sys.executable, os.path.join(ROOT, "main.py"), config_file],
+                            cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/.well-known/host-meta")
+            conn.getresponse().read()
+            return proc, port
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("Сервер не запустился")
+
+
+def pick_request():
+    """Выбирает запрос согласно смеси"""
+    r = random.random()
+    for weight, method, path, body in REQUEST_MIX:
+        if r < weight:
+            return method, path, body
+        r -= weight
+    return REQUEST_MIX[0][1:]
+
+
+def do_request(port, client_id):
+    """Выполняет один запрос от имени клиента (свой адрес 127.0.0.x)"""
+    method, path, body = pick_request()
+    source = (f"127.0.0.{2 + client_id % 200}", 0)
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30, source_address=source)
+    headers = {"Accept": "application/yang-data+json"}
+    payload = None
+    if body is not None:
+        payload = json.dumps(body)
+        headers["Content-Type"] = "application/yang-data+json"
+    try:
+        conn.request(method, path, body=payload, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        return response.status
+    except OSError:
+        return 0
+    finally:
+        conn.close()
+
+
+def closed_loop(port, duration, clients):
+    """Замкнутый цикл: каждый клиент отправляет следующий запрос после ответа"""
+    done = [0]
+    stop = time.monotonic() + duration
+    lock = threading.Lock()
+
+    def worker(client_id):
+        while time.monotonic() < stop:
+            if do_request(port, client_id) in (200, 204):
+                with lock:
+                    done[0] += 1
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in clients]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return done[0]
+
+
+def measure_capacity(port, duration):
+    """Измеряет пропускную способность сервера (клиенты в нескольких процессах)"""
+    groups = [range(i, CLIENTS, PROCESSES) for i in range(PROCESSES)]
+    with multiprocessing.Pool(PROCESSES) as pool:
+        done = pool.starmap(closed_loop, [(port, duration, g) for g in groups])
+    return sum(done) / duration
+
+
+def open_loop(port, rate, duration, clients, start):
+    """Подает нагрузку с постоянной интенсивностью, задержка считается от плановой отправки"""
+    schedule = queue.Queue()
+    results = []
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            item = schedule.get()
+            if item is None:
+                return
+            planned, client_id = item
+            delay = planned - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            status = do_request(port, client_id)
+            with lock:
+                results.append((status, time.monotonic() - planned))
+
+    threads = [threading.Thread(target=worker) for _ in range(128)]
+    for t in threads:
+        t.start()
+
+    start = time.monotonic() + (start - time.time())
+    total = int(rate * duration)
+    for i in range(total):
+        schedule.put((start + i / rate, clients[i % len(clients)]))
+    for _ in threads:
+        schedule.put(None)
+    for t in threads:
+        t.join()
+    return results
+
+
+def percentile(values, p):
+    """Возвращает перцентиль p (0..100)"""
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def admission_metrics(port):
+    """Возвращает метрики контроля допуска сервера"""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    try:
+        conn.request("GET", "/admin/metrics")
+        return json.loads(conn.getresponse().read())["admission"]
+    finally:
+        conn.close()
+
+
+def report(name, results, elapsed, metrics):
+    """Печатает сводку по прогону"""
+    ok = [lat for status, lat in results if status in (200, 204)]
+    rejected = [lat for status, lat in results if status == 503]
+    failed = len(results) - len(ok) - len(rejected)
+    print(f"\n--- {name} ---")
+    print(f"Запросов: {len(results)}, успешно: {len(ok)} ({len(ok) / elapsed:.0f}/с), "
+          f"503: {len(rejected)}, ошибок: {failed}")
+    print(f"Успешные: p50={percentile(ok, 50) * 1000:.1f} мс, "
+          f"p99={percentile(ok, 99) * 1000:.1f} мс, max={max(ok, default=0) * 1000:.1f} мс")
+    if rejected:
+        print(f"Отказы 503: p99={percentile(rejected, 99) * 1000:.1f} мс")
+    print("Допущено по классам: " + ", ".join(f"{cls}={count}" for cls, count in metrics["admitted"].items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--overload", type=float, default=2.0)
+    parser.add_argument("--artists", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        scenarios = [
+            ("Без контроля допуска", {
+                "budgets": {"read": 10000, "full_read": 10000, "write": 10000},
+                "per_client": 10000, "max_queue": 10000, "queue_timeout": 3600,
+            }),
+            ("С контролем допуска", {
+                "budgets": {"read": 2, "full_read": 1, "write": 1},
+                "per_client": 4, "max_queue": 8, "queue_timeout": 0.05,
+            }),
+        ]
+
+        proc, port = start_server(workdir, scenarios[1][1], args.artists)
+        try:
+            capacity = measure_capacity(port, 3)
+        finally:
+            proc.terminate()
+            proc.wait()
+        rate = capacity * args.overload
+        print(f"Пропускная способность: {capacity:.0f} запросов/с, "
+              f"нагрузка: {rate:.0f} запросов/с ({args.overload}x)")
+
+        for name, admission in scenarios:
+            proc, port = start_server(workdir, admission, args.artists)
+            groups = [list(range(i, CLIENTS, PROCESSES)) for i in range(PROCESSES)]
+            start = time.time() + 1
+            try:
+                with multiprocessing.Pool(PROCESSES) as pool:
+                    parts = pool.starmap(open_loop, [
+                        (port, rate / PROCESSES, args.duration, g, start) for g in groups
+                    ])
+                results = [r for part in parts for r in part]
+                elapsed = time.time() - start
+                metrics = admission_metrics(port)
+            finally:
+                proc.terminate()
+                proc.wait()
+            report(name, results, elapsed, metrics)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Общие генераторы данных и замер времени для бенчмарков"""
+import json
+import os
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_artists(artists, albums=10, songs=10, prefix="Artist"):
+    """Список исполнителей artists x albums x songs для library/artist"""
+    return [
+        {
+            "name": f"{prefix} {a}",
+            "album": [
+                {
+                    "name": f"Album {b}",
+                    "genre": "jbox:rock" if b % 2 else "jbox:jazz",
+                    "year": 1960 + b,
+                    "song": [
+                        {"name": f"Song {c}", "location": f"/media/{a}/{b}/{c}.mp3",
+                         "format": "MP3", "length": 180 + c}
+                        for c in range(songs)
+                    ]
+                }
+                for b in range(albums)
+            ]
+        }
+        for a in range(artists)
+    ]
+
+
+def make_library(artists, albums=10, songs=10):
+    """Синтетическая библиотека artists x albums x songs поверх data/initial_data.json"""
+    with open(os.path.join(ROOT, "data", "initial_data.json"), encoding="utf-8") as f:
+        data = json.load(f)
+    data["example-jukebox:jukebox"]["library"]["artist"] = make_artists(artists, albums, songs)
+    return data
+
+
+def best_of(repeat, func):
+    """Минимальное время из repeat запусков и результат последнего"""
+    times, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return min(times), result
@@ -1,8 +1,10 @@
 #!/usr/bin/env python3
 
 import os
+import signal
 import sys
-from app import YANGManager, RPCHandler, RESTCONFServer
+from app import YANGManager, RPCHandler, JobManager, AdmissionController, ReplicaFollower, RESTCONFServer, \
+    AsyncRESTCONFServer, DatastoreCheckpoint
 from app.utils import load_config
 
 
@@ -18,25 +20,113 @@ def main():
         print(f"Загружена конфигурация из: {config_file}")
 
         # Инициализируем YANG Manager
+        replication_config = config.get('replication', {})
+        datastore_config = config['datastore']
         yang_manager = YANGManager(
             library_file=config['yang']['library_file'],
             modules_dirs=config['yang']['modules_dir'], 
-            data_file=config['datastore']['data_file']
+            data_file=datastore_config['data_file'],
+            # Журнал изменений нужен только основному серверу с репликами
+            change_log_size=replication_config.get('change_log_size', 10000)
+            if replication_config.get('mode') == 'primary' else 0,
+            change_log_bytes=replication_config.get('change_log_bytes', 64 * 1024 * 1024),
+            bulk_change_bytes=replication_config.get('bulk_change_bytes', 1024 * 1024),
+            checkpoint_file=datastore_config.get('checkpoint_file')
         )
 
+        # Регистрируем производные config false узлы (счетчики записей списков)
+        for path, list_path in config.get('derived', {}).get('counters', {}).items():
+            yang_manager.register_counter(path, list_path)
+
+        # Вторичные индексы по неключевым листьям для параметра filter
+        for path in config.get('indexes') or []:
+            yang_manager.register_index(path)
+
+        # В режиме реплики загружаем снимок основного сервера и следуем его журналу
+        replica = None
+        if replication_config.get('mode') == 'replica':
+            replica = ReplicaFollower(
+                yang_manager,
+                primary_url=replication_config['primary_url'],
+                max_lag=replication_config.get('max_lag', 1000),
+                retry_interval=replication_config.get('retry_interval', 1.0)
+            )
+            print(f"Режим реплики, основной сервер: {replica.primary_url}")
+            replica.bootstrap()
+            replica.start()
+
+        # Периодически сохраняем двоичную контрольную точку данных
+        checkpoint = None
+        if datastore_config.get('checkpoint_file'):
+            checkpoint = DatastoreCheckpoint(
+                yang_manager,
+                path=datastore_config['checkpoint_file'],
+                interval=datastore_config.get('checkpoint_interval', 60)
+            )
+            checkpoint.start()
+
+        # SIGHUP запускает фоновую перезагрузку YANG модулей
+        if hasattr(signal, 'SIGHUP'):
+            signal.signal(signal.SIGHUP, lambda signum, frame: yang_manager.reload_schema())
+
         # Инициализируем RPC Handler
         rpc_handler = RPCHandler(yang_manager)
 
-        # Создаем и запускаем сервер
-        server = RESTCONFServer(
-            host=config['server']['host'],
-            port=config['server']['port'],
+        # Инициализируем пул для длительных RPC операций
+        rpc_config = config.get('rpc', {})
+        job_manager = JobManager(
+            long_running=rpc_config.get('long_running', []),
+            workers=rpc_config.get('workers', 4),
+            max_queue=rpc_config.get('max_queue', 16),
+            timeout=rpc_config.get('timeout', 30),
+            job_ttl=rpc_config.get('job_ttl', 300)
+        )
+
+        # Инициализируем контроль допуска запросов
+        admission_config = config.get('admission', {})
+        admission = AdmissionController(
+            budgets=admission_config.get('budgets'),
+            per_client=admission_config.get('per_client', 8),
+            max_queue=admission_config.get('max_queue', 64),
+            queue_timeout=admission_config.get('queue_timeout', 0.5),
+            retry_after=admission_config.get('retry_after', 1),
+            list_distance=yang_manager.list_distance
+        )
+
+        # Создаем и запускаем сервер (движок: threaded - поток на соединение,
+        # asyncio - цикл событий и пул потоков для обработки запросов)
+        server_config = config['server']
+        server_args = dict(
+            host=server_config['host'],
+            port=server_config['port'],
             yang_manager=yang_manager,
-            rpc_handler=rpc_handler
+            rpc_handler=rpc_handler,
+            job_manager=job_manager,
+            admission=admission,
+            replica=replica,
+            body_limits={
+                'data': server_config.get('max_body_size'),
+                'rpc': server_config.get('max_rpc_body_size')
+            }
         )
+        engine = server_config.get('engine', 'threaded')
+        if engine == 'asyncio':
+            server = AsyncRESTCONFServer(
+                workers=server_config.get('workers', 32),
+                keepalive_timeout=server_config.get('keepalive_timeout', 60),
+                **server_args
+            )
+        elif engine == 'threaded':
+            server = RESTCONFServer(**server_args)
+        else:
+            raise ValueError(f"Неизвестный движок сервера: {engine}")
 
         server.start()
 
+        # Сохраняем последние изменения для быстрого следующего запуска
+        if checkpoint:
+            checkpoint.stop()
+
     except KeyboardInterrupt:
         print("\nПолучен сигнал прерывания")
         sys.exit(0)
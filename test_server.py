@@ -1,11 +1,19 @@
 #!/usr/bin/env python3
 import requests
+import contextlib
+import io
 import json
+import os
+import shutil
+import tempfile
 import time
 import sys
+from app import YANGManager
 
 # Базовый URL сервера
 BASE_URL = "http://localhost:8080"
+# URL реплики (необязательно)
+REPLICA_URL = "http://localhost:8081"
 
 def test_server_running():
     """Проверяет, запущен ли сервер"""
@@ -60,6 +68,98 @@ def test_get_library():
     except Exception as e:
         print(f"Ошибка запроса: {e}")
 
+def test_batch_get():
+    """Тестирует пакетное чтение нескольких ресурсов"""
+    print("\n=== Тест: POST /restconf/batch ===")
+    try:
+        batch_data = {
+            "paths": [
+                "example-jukebox:jukebox/player",
+                {"path": "example-jukebox:jukebox/library/artist=Nirvana", "query": "depth=2"},
+                "example-jukebox:jukebox/library/artist=Unknown"
+            ]
+        }
+        response = requests.post(f"{BASE_URL}/restconf/batch",
+                               json=batch_data,
+                               headers={
+                                   "Content-Type": "application/yang-data+json",
+                                   "Accept": "application/yang-data+json"
+                               })
+        print(f"Статус: {response.status_code}")
+        if response.status_code == 200:
+            for result in response.json()["results"]:
+                print(f"{result['path']}: {result['status']}")
+        else:
+            print("Ошибка:", response.text)
+    except Exception as e:
+        print(f"Ошибка запроса: {e}")
+
+def test_filter():
+    """Тестирует отбор записей списка параметром filter"""
+    print("\n=== Тест: GET artist?filter=album/year>=1990 ===")
+    try:
+        response = requests.get(f"{BASE_URL}/restconf/data/example-jukebox:jukebox/library/artist",
+                              params={"filter": "album/year>=1990 and album/genre='jbox:rock'"},
+                              headers={"Accept": "application/yang-data+json"})
+        print(f"Статус: {response.status_code}")
+        if response.status_code == 200:
+            print("Исполнители:", [artist["name"] for artist in response.json()])
+        else:
+            print("Ошибка:", response.text)
+    except Exception as e:
+        print(f"Ошибка запроса: {e}")
+
+def test_counters_and_filter():
+    """Тестирует счетчики и filter после PATCH и DELETE, отказ для записей без ключа и с повтором ключа"""
+    print("\n=== Тест: счетчики и filter после PATCH/DELETE ===")
+    library = f"{BASE_URL}/restconf/data/example-jukebox:jukebox/library"
+    headers = {"Content-Type": "application/yang-data+json", "Accept": "application/yang-data+json"}
+
+    def state():
+        counts = requests.get(library, params={"depth": "2"}, headers=headers).json()
+        rock = requests.get(f"{library}/artist", params={"filter": "album/genre='jbox:rock'"},
+                            headers=headers).json()
+        return ({name: counts.get(name) for name in ("artist-count", "album-count", "song-count")},
+                sorted(artist["name"] for artist in rock))
+
+    def check(title, actual, expected):
+        print(f"{title}: {'OK' if actual == expected else f'ошибка, {actual} вместо {expected}'}")
+
+    try:
+        counts, rock = state()
+        new_artist = {"name": "Test Artist", "album": [
+            {"name": "First", "genre": "jbox:rock", "year": 2001,
+             "song": [{"name": "One", "location": "/media/test/1.mp3"}]},
+            {"name": "Second", "genre": "jbox:jazz", "year": 2002}
+        ]}
+        response = requests.patch(library, json={"artist": [new_artist]}, headers=headers)
+        print(f"PATCH исполнителя: {response.status_code}")
+        check("Счетчики после PATCH", state()[0], {
+            "artist-count": counts["artist-count"] + 1, "album-count": counts["album-count"] + 2,
+            "song-count": counts["song-count"] + 1
+        })
+        check("filter после PATCH", state()[1], sorted(rock + ["Test Artist"]))
+
+        for title, body in [
+            ("Запись без ключа", {"artist": [{"album": []}]}),
+            ("Повтор ключа", {"artist": [{"name": "Other", "album": [{"name": "d"}, {"name": "d"}]}]})
+        ]:
+            response = requests.patch(library, json=body, headers=headers)
+            check(f"{title}: статус", response.status_code, 400)
+        check("Счетчики после отказов", state()[0], {
+            "artist-count": counts["artist-count"] + 1, "album-count": counts["album-count"] + 2,
+            "song-count": counts["song-count"] + 1
+        })
+
+        response = requests.delete(f"{library}/artist=Test%20Artist/album=First")
+        print(f"DELETE альбома: {response.status_code}")
+        check("filter после DELETE альбома", state()[1], rock)
+        response = requests.delete(f"{library}/artist=Test%20Artist")
+        print(f"DELETE исполнителя: {response.status_code}")
+        check("Счетчики после DELETE", state(), (counts, rock))
+    except Exception as e:
+        print(f"Ошибка запроса: {e}")
+
 def test_patch_player():
     """Тестирует обновление настроек плеера"""
     print("\n=== Тест: PATCH player settings ===")
@@ -79,6 +179,43 @@ def test_patch_player():
     except Exception as e:
         print(f"Ошибка запроса: {e}")
 
+def test_patch_chunked():
+    """Тестирует PATCH с телом Transfer-Encoding: chunked"""
+    print("\n=== Тест: PATCH с chunked телом ===")
+    try:
+        body = json.dumps({"gap": "1.5"}).encode("utf-8")
+        response = requests.patch(f"{BASE_URL}/restconf/data/example-jukebox:jukebox/player",
+                                data=iter([body[:5], body[5:]]),
+                                headers={"Content-Type": "application/yang-data+json"})
+        print(f"Статус: {response.status_code}")
+        if response.status_code not in [200, 204]:
+            print("Ошибка:", response.text)
+    except Exception as e:
+        print(f"Ошибка запроса: {e}")
+
+def test_patch_rfc_bodies():
+    """Тестирует PATCH записи списка и листа с телом в форме RFC 8040"""
+    print("\n=== Тест: PATCH с телом в форме RFC 8040 ===")
+    album = f"{BASE_URL}/restconf/data/example-jukebox:jukebox/library/artist=Nirvana/album=Nevermind"
+    headers = {"Content-Type": "application/yang-data+json"}
+    try:
+        for url, body in [
+            (album, {"example-jukebox:album": [{"name": "Nevermind", "year": 1992}]}),
+            (f"{album}/year", {"example-jukebox:year": 1992}),
+            (f"{album}/year", {"year": 1991}),
+        ]:
+            response = requests.patch(url, json=body, headers=headers)
+            print(f"{json.dumps(body)}: {response.status_code}")
+            if response.status_code not in [200, 204]:
+                print("Ошибка:", response.text)
+
+        # Ключ записи в теле должен совпадать с ключом в URI
+        response = requests.patch(album, json={"example-jukebox:album": [{"name": "Bleach"}]},
+                                  headers=headers)
+        print(f"Чужой ключ записи: {response.status_code}")
+    except Exception as e:
+        print(f"Ошибка запроса: {e}")
+
 def test_rpc_play():
     """Тестирует RPC операцию play"""
     print("\n=== Тест: POST RPC play ===")
@@ -96,11 +233,23 @@ def test_rpc_play():
                                    "Accept": "application/yang-data+json"
                                })
         print(f"Статус: {response.status_code}")
+        if response.status_code == 202:
+            # Длительная операция - дожидаемся завершения задания
+            job_url = f"{BASE_URL}{response.headers['Location']}"
+            response = requests.get(f"{job_url}?wait=5",
+                                  headers={"Accept": "application/yang-data+json"})
+            print(f"Статус задания: {response.json()['job']['status']}")
         if response.status_code == 200:
             result = response.json()
             print("Результат RPC:", json.dumps(result, indent=2, ensure_ascii=False))
         else:
             print("Ошибка:", response.text)
+
+        # Неверный вход отклоняется сразу, задание не создается
+        response = requests.post(f"{BASE_URL}/restconf/operations/example-jukebox:play",
+                               json={"input": {"playlist": "Favorites"}},
+                               headers={"Content-Type": "application/yang-data+json"})
+        print(f"Без song-number: {response.status_code} (ожидается 400)")
     except Exception as e:
         print(f"Ошибка запроса: {e}")
 
@@ -119,6 +268,66 @@ def test_get_operations():
     except Exception as e:
         print(f"Ошибка запроса: {e}")
 
+def test_replica():
+    """Тестирует реплику (python3 main.py config/replica.yaml на порту 8081)"""
+    print("\n=== Тест: реплика только для чтения ===")
+    try:
+        requests.get(f"{REPLICA_URL}/.well-known/host-meta", timeout=2)
+    except Exception:
+        print("Реплика не запущена, тест пропущен")
+        return
+    try:
+        # Изменение на основном сервере должно появиться на реплике
+        requests.patch(f"{BASE_URL}/restconf/data/example-jukebox:jukebox/player",
+                     json={"gap": "0.5"},
+                     headers={"Content-Type": "application/yang-data+json"})
+        time.sleep(0.5)
+        response = requests.get(f"{REPLICA_URL}/restconf/data/example-jukebox:jukebox/player",
+                              headers={"Accept": "application/yang-data+json"})
+        print(f"Данные плеера на реплике: {response.json()}")
+
+        response = requests.patch(f"{REPLICA_URL}/restconf/data/example-jukebox:jukebox/player",
+                                json={"gap": "0.5"},
+                                headers={"Content-Type": "application/yang-data+json"})
+        print(f"Запись на реплику: {response.status_code}")
+
+        status = requests.get(f"{REPLICA_URL}/admin/replication").json()["replication"]
+        print(f"Состояние: {status['state']}, отставание: {status['lag-changes']} изменений, "
+              f"{status['lag-seconds']} с")
+    except Exception as e:
+        print(f"Ошибка запроса: {e}")
+
+def test_reload_invalid():
+    """Проверяет, что перезагрузка схемы, с которой данные не проходят валидацию, отклоняется"""
+    print("\n=== Тест: перезагрузка схемы, несовместимой с данными ===")
+
+    root = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as workdir:
+        # Копии модулей и данных: сервер и файлы репозитория не затрагиваются
+        modules = os.path.join(workdir, "yang_modules")
+        data_file = os.path.join(workdir, "data.json")
+        shutil.copytree(os.path.join(root, "yang_modules"), modules)
+        shutil.copy(os.path.join(root, "data", "initial_data.json"), data_file)
+        with contextlib.redirect_stdout(io.StringIO()):
+            manager = YANGManager(os.path.join(root, "library.json"), [modules], data_file)
+
+        def reload():
+            with contextlib.redirect_stdout(io.StringIO()):
+                manager.reload_schema()
+                while manager.reload_status["status"] == "in-progress":
+                    time.sleep(0.05)
+            return manager.reload_status
+
+        print(f"Та же схема: {reload()['status']}")
+        module_file = os.path.join(modules, "example-jukebox.yang")
+        with open(module_file, encoding="utf-8") as f:
+            text = f.read()
+        with open(module_file, "w", encoding="utf-8") as f:
+            f.write(text.replace('range "1900 .. max"', 'range "2000 .. max"'))
+        status = reload()
+        print(f"Схема, запрещающая годы альбомов: {status['status']}")
+        assert status["status"] == "failed", status
+
 def main():
     print("🎵 Тестирование RESTCONF Jukebox сервера")
     print("=" * 50)
@@ -136,8 +345,15 @@ def main():
     test_get_all_data()
     test_get_library()
     test_get_operations()
+    test_batch_get()
+    test_filter()
+    test_counters_and_filter()
     test_patch_player()
+    test_patch_chunked()
+    test_patch_rfc_bodies()
     test_rpc_play()
+    test_replica()
+    test_reload_invalid()
 
     print("\n" + "=" * 50)
     print(" Тестирование завершено!")